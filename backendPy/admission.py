@@ -0,0 +1,236 @@
+# admission.py
+"""
+Admission control for the expensive endpoints.
+
+Each endpoint class has its own concurrency limit, queue depth and maximum
+queue wait. All classes also share ADMISSION_TOTAL_SLOTS, and only the
+interactive class may use the last ADMISSION_INTERACTIVE_RESERVE of them.
+When a slot frees up, waiting Q&A requests are admitted before summarization
+and ingestion.
+
+A request is shed with 503 + Retry-After when its class queue is full on
+arrival, or when it has waited longer than the class allows. The slot is held
+until the last body chunk has been sent, so streamed bodies count against
+their class; BackgroundTasks (document processing after /documents/upload,
+bulk ingestion) do not and are limited where they run.
+"""
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+
+from config import settings
+from metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_ACTIVE, ADMISSION_WAIT_SECONDS, ADMISSION_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# (method, path prefix) -> class; first match wins
+ROUTES = (
+    ("POST", "/qa/ask", "qa"),                # /qa/ask, /qa/ask/stream, /qa/ask-batch
+    ("POST", "/summarize", "summarize"),
+    ("POST", "/simplify", "summarize"),
+    ("POST", "/documents/upload", "ingest"),
+    ("POST", "/documents/bulk", "ingest"),    # /documents/bulk, /documents/bulk/{id}/resume
+)
+
+
+def admission_class(method: str, path: str) -> Optional[str]:
+    for m, prefix, name in ROUTES:
+        if method == m and path.startswith(prefix):
+            return name
+    return None
+
+
+class Rejected(Exception):
+    def __init__(self, name: str, reason: str, retry_after: int):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionClass:
+    name: str
+    priority: int          # lower is admitted first
+    limit: int
+    max_queue: int
+    max_wait_s: float
+    interactive: bool = False
+    active: int = 0
+    waiters: deque = field(default_factory=deque)
+    avg_service_s: float = 1.0  # EWMA, for Retry-After
+
+
+class AdmissionController:
+    def __init__(self, classes: list, total_slots: int, interactive_reserve: int):
+        self.classes = {c.name: c for c in classes}
+        self.by_priority = sorted(classes, key=lambda c: c.priority)
+        self.total_slots = total_slots
+        self.interactive_reserve = interactive_reserve
+        self.active = 0
+
+    def _can_start(self, cls: AdmissionClass) -> bool:
+        capacity = self.total_slots if cls.interactive else self.total_slots - self.interactive_reserve
+        return cls.active < cls.limit and self.active < capacity
+
+    def _start(self, cls: AdmissionClass):
+        cls.active += 1
+        self.active += 1
+        ADMISSION_ACTIVE.labels(cls.name).set(cls.active)
+
+    def _retry_after(self, cls: AdmissionClass) -> int:
+        backlog = (len(cls.waiters) + 1) / max(cls.limit, 1)
+        return max(1, math.ceil(cls.avg_service_s * backlog))
+
+    def _reject(self, cls: AdmissionClass, reason: str):
+        ADMISSION_REJECTED.labels(cls.name, reason).inc()
+        raise Rejected(cls.name, reason, self._retry_after(cls))
+
+    def _dispatch(self):
+        # hand freed slots to waiters, highest priority class first
+        for cls in self.by_priority:
+            while cls.waiters and self._can_start(cls):
+                future = cls.waiters.popleft()
+                if future.done():
+                    continue
+                self._start(cls)
+                future.set_result(None)
+            ADMISSION_QUEUE_DEPTH.labels(cls.name).set(len(cls.waiters))
+
+    def _higher_priority_waiting(self, cls: AdmissionClass) -> bool:
+        return any(c.waiters for c in self.by_priority if c.priority <= cls.priority)
+
+    async def acquire(self, name: str):
+        cls = self.classes[name]
+        if self._can_start(cls) and not self._higher_priority_waiting(cls):
+            self._start(cls)
+            ADMISSION_WAIT_SECONDS.labels(name).observe(0)
+            return
+
+        if len(cls.waiters) >= cls.max_queue:
+            self._reject(cls, "queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        cls.waiters.append(future)
+        ADMISSION_QUEUE_DEPTH.labels(name).set(len(cls.waiters))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=cls.max_wait_s)
+        except BaseException as e:
+            # timed out or client went away; a slot granted in the meantime goes back
+            if future.done() and not future.cancelled():
+                self.release(name)
+            else:
+                future.cancel()
+                try:
+                    cls.waiters.remove(future)
+                except ValueError:
+                    pass
+                ADMISSION_QUEUE_DEPTH.labels(name).set(len(cls.waiters))
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject(cls, "wait_timeout")
+            raise
+        ADMISSION_WAIT_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+    def release(self, name: str, service_s: float = None):
+        cls = self.classes[name]
+        cls.active -= 1
+        self.active -= 1
+        ADMISSION_ACTIVE.labels(name).set(cls.active)
+        if service_s is not None:
+            cls.avg_service_s = 0.8 * cls.avg_service_s + 0.2 * service_s
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            c.name: {"active": c.active, "queued": len(c.waiters), "limit": c.limit, "max_queue": c.max_queue}
+            for c in self.by_priority
+        }
+
+
+def build_controller() -> AdmissionController:
+    return AdmissionController(
+        [
+            AdmissionClass(
+                "qa", priority=0, interactive=True,
+                limit=settings.ADMISSION_QA_CONCURRENCY,
+                max_queue=settings.ADMISSION_QA_QUEUE,
+                max_wait_s=settings.ADMISSION_QA_MAX_WAIT_SECONDS,
+            ),
+            AdmissionClass(
+                "summarize", priority=1,
+                limit=settings.ADMISSION_SUMMARIZE_CONCURRENCY,
+                max_queue=settings.ADMISSION_SUMMARIZE_QUEUE,
+                max_wait_s=settings.ADMISSION_SUMMARIZE_MAX_WAIT_SECONDS,
+            ),
+            AdmissionClass(
+                "ingest", priority=2,
+                limit=settings.ADMISSION_INGEST_CONCURRENCY,
+                max_queue=settings.ADMISSION_INGEST_QUEUE,
+                max_wait_s=settings.ADMISSION_INGEST_MAX_WAIT_SECONDS,
+            ),
+        ],
+        total_slots=settings.ADMISSION_TOTAL_SLOTS,
+        interactive_reserve=settings.ADMISSION_INTERACTIVE_RESERVE,
+    )
+
+
+admission = build_controller()
+
+
+# -----------------------------
+# ASGI middleware
+# -----------------------------
+class AdmissionMiddleware:
+    """
+    Plain ASGI middleware rather than @app.middleware("http"): the slot must
+    stay held while the response body streams, and be released as soon as
+    the last chunk is sent, before BackgroundTasks run.
+    """
+
+    def __init__(self, app, controller: AdmissionController = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        name = None
+        if scope["type"] == "http" and settings.ADMISSION_ENABLED:
+            name = admission_class(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await self.controller.acquire(name)
+        except Rejected as r:
+            logger.info("Shed %s %s (%s)", scope["method"], scope["path"], r.reason)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": f"Server busy ({r.name}), retry later"},
+                headers={"Retry-After": str(r.retry_after)},
+            )
+            return await response(scope, receive, send)
+
+        start = time.perf_counter()
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.controller.release(name, time.perf_counter() - start)
+
+        async def send_and_release(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
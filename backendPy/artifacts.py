@@ -0,0 +1,246 @@
+# artifacts.py
+"""
+Per-document artifacts computed after ingestion: the summary and the
+whole-document simplification. They are built by one background thread
+running at a lower OS priority, so uploads and Q&A are served first.
+
+State lives on the document record under artifacts.<kind>:
+    {"status": "PENDING" | "RUNNING" | "READY" | "FAILED", "updated_at", ...}
+The summary text is stored inline. The simplified document can be large, so
+it is written to ARTIFACTS_DIR/<id>.simplified.txt with one sentence per line.
+
+Every uvicorn worker runs its own ArtifactWorker, so a job is claimed with one
+atomic PENDING -> RUNNING update that records an owner and a lease; only the
+worker that claimed it builds it. The owner renews the lease while building.
+RUNNING jobs whose lease has expired (the owner died) are claimable again and
+are picked up by the periodic recover() of any worker.
+"""
+import os
+import queue
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from config import settings
+from db import documents_col
+from metrics import track_stage
+from extraction import extract_text_from_file
+from simplification.model import iter_simplified
+from status_events import status_bus
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_KINDS = ("summary", "simplified")
+UNFINISHED = ("PENDING", "RUNNING")
+
+
+def enabled_artifacts() -> list:
+    return [k for k in settings.ARTIFACT_STAGES if k in ARTIFACT_KINDS]
+
+
+def pending_fields(now: datetime = None) -> dict:
+    """
+    $set fields marking every enabled artifact PENDING; merged into the
+    update that marks a document READY.
+    """
+    now = now or datetime.utcnow()
+    return {f"artifacts.{k}": {"status": "PENDING", "updated_at": now} for k in enabled_artifacts()}
+
+
+def simplified_path(document_id: str) -> str:
+    return os.path.join(settings.ARTIFACTS_DIR, f"{document_id}.simplified.txt")
+
+
+def _claimable(kind: str, now: datetime) -> dict:
+    # PENDING, or RUNNING for an owner that stopped renewing its lease
+    return {"$or": [
+        {f"artifacts.{kind}.status": "PENDING"},
+        {f"artifacts.{kind}.status": "RUNNING", f"artifacts.{kind}.lease_until": {"$not": {"$gte": now}}},
+    ]}
+
+
+def _lower_priority():
+    # Linux schedules threads individually, so this renices only the worker thread
+    try:
+        tid = threading.get_native_id()
+        if os.getpriority(os.PRIO_PROCESS, tid) < settings.ARTIFACT_WORKER_NICE:
+            os.setpriority(os.PRIO_PROCESS, tid, settings.ARTIFACT_WORKER_NICE)
+    except (AttributeError, OSError):
+        logger.debug("Could not lower artifact worker priority")
+
+
+class ArtifactWorker:
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.summarize = None  # text -> summary, provided by the app at startup
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._queued = set()   # document ids waiting in self.queue
+        self._queued_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, summarize_fn):
+        if self.running:
+            return
+        self.summarize = summarize_fn
+        self.thread = threading.Thread(target=self._run, name="artifact-worker", daemon=True)
+        self.thread.start()
+        self.recover()
+
+    def stop(self, timeout: float = 5.0):
+        if self.running:
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def submit(self, document_id: str, file_path: str, text: str = None) -> bool:
+        """
+        Queue a document whose artifacts are marked PENDING. Extracted text
+        is kept only for the first few queued jobs; later ones extract again
+        from file_path so a long backlog does not hold every document in
+        memory. Returns False when no worker is running (e.g. the bulk_ingest
+        CLI); the job then starts with the next server start.
+        """
+        if not self.running:
+            return False
+        with self._queued_lock:
+            if document_id in self._queued:
+                return True
+            self._queued.add(document_id)
+        if self.queue.qsize() >= settings.ARTIFACT_MAX_QUEUED_TEXTS:
+            text = None
+        self.queue.put((document_id, file_path, text))
+        return True
+
+    def recover(self):
+        """
+        Queue documents with claimable artifacts. Several workers may queue
+        the same document; the claim in build() lets only one of them run it.
+        """
+        now = datetime.utcnow()
+        query = {"$or": [_claimable(k, now) for k in ARTIFACT_KINDS]}
+        count = 0
+        for doc in documents_col.find(query, {"file_path": 1}):
+            self.submit(str(doc["_id"]), doc.get("file_path"))
+            count += 1
+        if count:
+            logger.info("Queued artifacts for %d documents", count)
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    def _run(self):
+        _lower_priority()
+        while True:
+            try:
+                job = self.queue.get(timeout=settings.ARTIFACT_RECOVER_INTERVAL_SECONDS)
+            except queue.Empty:
+                # pick up jobs whose owner died (expired lease)
+                try:
+                    self.recover()
+                except Exception:
+                    logger.exception("Artifact recovery failed")
+                continue
+            if job is None:
+                break
+            with self._queued_lock:
+                self._queued.discard(job[0])
+            try:
+                self.build(*job)
+            except Exception:
+                logger.exception("Artifact job failed for document %s", job[0])
+
+    def _claim(self, document_id: str, kind: str) -> bool:
+        now = datetime.utcnow()
+        claimed = documents_col.find_one_and_update(
+            {"_id": ObjectId(document_id), **_claimable(kind, now)},
+            {"$set": {f"artifacts.{kind}": {
+                "status": "RUNNING",
+                "owner": self.owner,
+                "lease_until": now + timedelta(seconds=settings.ARTIFACT_LEASE_SECONDS),
+                "updated_at": now,
+            }}},
+            projection={"_id": 1},
+        )
+        return claimed is not None
+
+    @contextmanager
+    def _lease(self, document_id: str, kind: str):
+        # renew the lease while a (possibly long) build runs
+        stop = threading.Event()
+
+        def renew():
+            while not stop.wait(settings.ARTIFACT_LEASE_SECONDS / 3):
+                documents_col.update_one(
+                    {"_id": ObjectId(document_id), f"artifacts.{kind}.owner": self.owner},
+                    {"$set": {f"artifacts.{kind}.lease_until": datetime.utcnow() + timedelta(seconds=settings.ARTIFACT_LEASE_SECONDS)}},
+                )
+
+        thread = threading.Thread(target=renew, name=f"artifact-lease-{kind}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+
+    def build(self, document_id: str, file_path: str, text: str = None):
+        doc = documents_col.find_one({"_id": ObjectId(document_id)}, {"artifacts": 1, "file_path": 1, "user_id": 1})
+        if not doc:
+            return
+        kinds = [
+            k for k, a in doc.get("artifacts", {}).items()
+            if k in ARTIFACT_KINDS and a.get("status") in UNFINISHED
+        ]
+
+        user_id = doc.get("user_id")
+        for kind in kinds:
+            if not self._claim(document_id, kind):
+                continue  # another worker has it, or it finished meanwhile
+            status_bus.publish(user_id, document_id, artifacts={kind: "RUNNING"})
+            timings = {}
+            try:
+                if text is None:
+                    text = extract_text_from_file(file_path or doc["file_path"])
+                with self._lease(document_id, kind), track_stage(f"artifact_{kind}", timings):
+                    fields = getattr(self, f"_build_{kind}")(document_id, text)
+                self._set(document_id, user_id, kind, {"status": "READY", "seconds": timings[f"artifact_{kind}"], **fields})
+            except Exception as e:
+                logger.exception("Building %s for document %s failed", kind, document_id)
+                self._set(document_id, user_id, kind, {"status": "FAILED", "error": str(e)})
+
+    def _build_summary(self, document_id: str, text: str) -> dict:
+        if self.summarize is None:
+            raise RuntimeError("Summarizer is not loaded")
+        return {"text": self.summarize(text)}
+
+    def _build_simplified(self, document_id: str, text: str) -> dict:
+        path = simplified_path(document_id)
+        tmp = path + ".tmp"
+        count = 0
+        with open(tmp, "w", encoding="utf-8") as f:
+            for sentence in iter_simplified([text]):
+                f.write(sentence + "\n")
+                count += 1
+        os.replace(tmp, path)
+        return {"sentences": count}
+
+    def _set(self, document_id: str, user_id: str, kind: str, fields: dict):
+        # only while we still own the job: after our lease expired, recover()
+        # may have handed it to another worker whose result must not be overwritten
+        res = documents_col.update_one(
+            {"_id": ObjectId(document_id), f"artifacts.{kind}.owner": self.owner},
+            {"$set": {f"artifacts.{kind}": {**fields, "updated_at": datetime.utcnow()}}}
+        )
+        if res.matched_count == 0:
+            logger.warning("Lost the %s lease for document %s; dropping %s result", kind, document_id, fields["status"])
+            return
+        status_bus.publish(user_id, document_id, artifacts={kind: fields["status"]})
+
+
+artifact_worker = ArtifactWorker()
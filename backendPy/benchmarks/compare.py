@@ -0,0 +1,68 @@
+# benchmarks/compare.py
+import json
+
+# lower is better for these, higher is better for the *_per_s ones
+LATENCY_KEYS = ("p50_s", "p95_s", "mean_s")
+THROUGHPUT_KEYS = ("items_per_s",)
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.15) -> list:
+    """
+    Compare two result files stage by stage. A metric regresses when it is
+    more than `threshold` (fraction) worse than the baseline.
+
+    Returns a list of {"stage", "metric", "baseline", "current", "change"}.
+    """
+    regressions = []
+    cur_stages = current.get("stages", {})
+    base_stages = baseline.get("stages", {})
+
+    for stage, base in base_stages.items():
+        cur = cur_stages.get(stage)
+        if not cur or "error" in cur or "error" in base:
+            continue
+
+        for key in LATENCY_KEYS:
+            if base.get(key) and cur.get(key) is not None:
+                change = cur[key] / base[key] - 1
+                if change > threshold:
+                    regressions.append({"stage": stage, "metric": key, "baseline": base[key], "current": cur[key], "change": change})
+
+        for key in THROUGHPUT_KEYS:
+            if base.get(key) and cur.get(key) is not None:
+                change = cur[key] / base[key] - 1
+                if change < -threshold:
+                    regressions.append({"stage": stage, "metric": key, "baseline": base[key], "current": cur[key], "change": change})
+
+    return regressions
+
+
+def format_report(results: dict, regressions: list = None) -> str:
+    lines = [f"{'stage':<32}{'items':>8}{'p50 ms':>12}{'p95 ms':>12}{'items/s':>12}"]
+    for stage, r in results.get("stages", {}).items():
+        if "error" in r:
+            lines.append(f"{stage:<32}  skipped: {r['error']}")
+            continue
+        lines.append(
+            f"{stage:<32}{r['items']:>8}{r['p50_s'] * 1000:>12.2f}{r['p95_s'] * 1000:>12.2f}{r['items_per_s']:>12.2f}"
+        )
+
+    if regressions is not None:
+        lines.append("")
+        if not regressions:
+            lines.append("No regressions against baseline.")
+        for reg in regressions:
+            lines.append(
+                f"REGRESSION {reg['stage']}.{reg['metric']}: {reg['baseline']:.4g} -> {reg['current']:.4g} ({reg['change']:+.1%})"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,82 @@
+# benchmarks/embedding_backends.py
+"""
+Parity and throughput check of the ONNX Runtime embedder against the
+PyTorch (sentence-transformers) one, on chunks of sample_contracts.
+
+    cd backendPy
+    python -m benchmarks.embedding_backends --quantize --output embed.json
+
+Exits non-zero if any ONNX variant's per-chunk cosine similarity to the
+PyTorch embedding drops below the configured minimum.
+"""
+import sys
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.run import load_corpus, measure
+from benchmarks.compare import save_results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ONNX vs PyTorch embedder parity + throughput")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--quantize", action="store_true", help="also check the int8 model")
+    parser.add_argument("--min-cosine", type=float, default=0.999)
+    parser.add_argument("--min-cosine-int8", type=float, default=0.98)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    from config import settings
+    from extraction import chunk_text
+    from utils import EMBED_MODEL, embedder, load_embedder
+    from onnx_embedder import OnnxEmbedder
+
+    _, texts = load_corpus()
+    chunks = [c for t in texts for c in chunk_text(t)]
+
+    torch_model = embedder if settings.EMBED_BACKEND == "torch" else load_embedder("torch")
+    variants = {"torch": (torch_model, None)}
+    variants["onnx_fp32"] = (OnnxEmbedder.from_pretrained(EMBED_MODEL, settings.EMBED_ONNX_DIR), args.min_cosine)
+    if args.quantize:
+        variants["onnx_int8"] = (OnnxEmbedder.from_pretrained(EMBED_MODEL, settings.EMBED_ONNX_DIR, quantize=True), args.min_cosine_int8)
+
+    def encode(model):
+        return model.encode(chunks, batch_size=args.batch_size, normalize_embeddings=True, convert_to_numpy=True)
+
+    reference = encode(variants["torch"][0]).astype("float32")
+    results = {}
+    failed = False
+
+    for name, (model, min_cosine) in variants.items():
+        stats = measure(lambda _: encode(model), [chunks], args.repeat, count=len)
+        if min_cosine is not None:
+            cos = np.sum(encode(model) * reference, axis=1)
+            stats.update({"cosine_min": float(cos.min()), "cosine_mean": float(cos.mean()), "cosine_required": min_cosine})
+            failed |= bool(cos.min() < min_cosine)
+        results[name] = stats
+
+    torch_rate = results["torch"]["items_per_s"]
+    print(f"{'backend':<12}{'chunks/s':>12}{'speedup':>10}{'cos min':>10}{'cos mean':>10}")
+    for name, r in results.items():
+        print(
+            f"{name:<12}{r['items_per_s']:>12.2f}{r['items_per_s'] / torch_rate:>9.2f}x"
+            f"{r.get('cosine_min', 1.0):>10.4f}{r.get('cosine_mean', 1.0):>10.4f}"
+        )
+
+    if args.output:
+        save_results({
+            "created_at": datetime.utcnow().isoformat(),
+            "params": {"batch_size": args.batch_size, "chunks": len(chunks)},
+            "stages": {f"embed_{k}": v for k, v in results.items()},
+        }, args.output)
+
+    if failed:
+        print("PARITY FAILURE: ONNX embeddings diverge from PyTorch", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+# benchmarks/loadtest.py
+"""
+End-to-end load test: starts the API (uvicorn subprocess) against a local
+mongod and a stub chat-completions server, then drives a mixed workload
+(uploads, status polling, Q&A, summarize, simplify) at stepped arrival
+rates.
+
+    cd backendPy
+    python -m benchmarks.loadtest --rates 1,2,4,8,16 --step-seconds 60 --output load.json
+    python -m benchmarks.loadtest --baseline load.json --threshold 0.2
+
+Arrivals are open-loop (Poisson at each step's rate), so a slow server shows
+up as growing latency and errors instead of a slower client. A step is
+saturated when completed throughput falls below --min-goodput of the
+offered rate, the error rate (including 503 load shedding) exceeds
+--max-error-rate, or an endpoint's p99 exceeds --slo-p99. The report gives
+per-endpoint p50/p95/p99 and throughput for each step, and the highest
+rate sustained before saturation.
+
+The embedding and summarization models load for real (from the local
+Hugging Face cache); only MongoDB and the LLM are replaced. Use
+--mongodb-uri to reuse a running mongod instead of starting one.
+"""
+import os
+import sys
+import glob
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+import httpx
+
+from benchmarks.run import QUERIES, SAMPLE_DIR
+from benchmarks.compare import compare, load_results, save_results
+from benchmarks.stub_llm import start_stub
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("upload", "status", "qa", "summarize", "simplify")
+MIME = {".pdf": "application/pdf", ".txt": "text/plain", ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+
+
+# -----------------------------
+# Local stand-ins
+# -----------------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"nothing listening on port {port} after {timeout}s")
+
+
+def start_mongod(binary: str, workdir: str):
+    port = free_port()
+    dbpath = os.path.join(workdir, "mongo")
+    os.makedirs(dbpath, exist_ok=True)
+    proc = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=open(os.path.join(workdir, "mongod.log"), "w"),
+        stderr=subprocess.STDOUT,
+    )
+    wait_for_port(port, 30)
+    return proc, f"mongodb://127.0.0.1:{port}"
+
+
+def start_api(args, workdir: str, mongodb_uri: str, llm_url: str):
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "MONGODB_URI": mongodb_uri,
+        "DB_NAME": f"legalease_loadtest_{int(time.time())}",
+        "SECRET_KEY": "loadtest",
+        "OPENROUTER_API_KEY": "loadtest",
+        "GENERATION_BACKENDS": '["local"]',
+        "LOCAL_LLM_BASE_URL": llm_url,
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "INDEX_DIR": os.path.join(workdir, "indexes"),
+        "CHUNKS_DIR": os.path.join(workdir, "chunks"),
+        "ARTIFACTS_DIR": os.path.join(workdir, "artifacts"),
+        "SIMPLIFY_CACHE_DIR": os.path.join(workdir, "simplify_cache"),
+        "LOG_LEVEL": "WARNING",
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+    })
+    if args.no_artifacts:
+        env["ARTIFACT_STAGES"] = "[]"
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=open(os.path.join(workdir, "api.log"), "w"),
+        stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited during startup, see {workdir}/api.log")
+        try:
+            if httpx.get(base_url + "/", timeout=2).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    proc.terminate()
+    raise TimeoutError(f"API not ready after {args.startup_timeout}s, see {workdir}/api.log")
+
+
+def stop(proc):
+    if proc and proc.poll() is None:
+        proc.terminate()
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# -----------------------------
+# Workload
+# -----------------------------
+def load_samples() -> list:
+    samples = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*"))):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in MIME:
+            with open(path, "rb") as f:
+                samples.append((os.path.basename(path), f.read(), MIME[ext]))
+    if not samples:
+        raise RuntimeError(f"no sample contracts in {SAMPLE_DIR}")
+    return samples
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, samples: list, simplify_text: str):
+        self.client = client
+        self.samples = samples
+        self.simplify_text = simplify_text
+        self.uploaded = []  # every document id created
+        self.ready = []     # ids seen READY
+
+    async def login(self):
+        creds = {"email": f"loadtest-{int(time.time())}@example.com", "password": "loadtest-password"}
+        r = await self.client.post("/auth/signup", json={"username": "loadtest", "name": "Load Test", "age": 30, **creds})
+        r.raise_for_status()
+        r = await self.client.post("/auth/token", data={"username": creds["email"], "password": creds["password"]})
+        r.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+
+    async def upload(self):
+        name, data, mime = random.choice(self.samples)
+        r = await self.client.post("/documents/upload", files={"file": (name, data, mime)})
+        if r.status_code == 200:
+            self.uploaded.append(r.json()["document_id"])
+        return r
+
+    def resolve(self, name: str) -> str:
+        # the op actually run: status needs an uploaded document and qa a READY
+        # one, so during warm-up they become upload / status (and are recorded so)
+        if name == "qa" and not self.ready:
+            name = "status"
+        if name == "status" and not self.uploaded:
+            name = "upload"
+        return name
+
+    async def status(self):
+        document_id = random.choice(self.uploaded)
+        r = await self.client.get(f"/documents/status/{document_id}")
+        if r.status_code == 200 and r.json()["status"] == "READY" and document_id not in self.ready:
+            self.ready.append(document_id)
+        return r
+
+    async def qa(self):
+        return await self.client.post("/qa/ask", json={"document_id": random.choice(self.ready), "question": random.choice(QUERIES)})
+
+    async def summarize(self):
+        name, data, mime = random.choice(self.samples)
+        return await self.client.post("/summarize", files={"file": (name, data, mime)})
+
+    async def simplify(self):
+        return await self.client.post("/simplify", data={"text": self.simplify_text})
+
+    async def seed(self, docs: int, timeout: float):
+        for _ in range(docs):
+            (await self.upload()).raise_for_status()
+        deadline = time.time() + timeout
+        while len(self.ready) < docs and time.time() < deadline:
+            for document_id in list(self.uploaded):
+                if document_id not in self.ready:
+                    await self.status()
+            await asyncio.sleep(1)
+        if not self.ready:
+            raise RuntimeError("no seeded document became READY")
+
+
+async def run_step(workload: Workload, weights: dict, rate: float, seconds: float, max_inflight: int) -> list:
+    names = list(weights)
+    probs = [weights[n] for n in names]
+    records = []
+    inflight = set()
+
+    async def one(name: str):
+        start = time.perf_counter()
+        try:
+            r = await getattr(workload, name)()
+            status = r.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        records.append({"endpoint": name, "status": status, "latency_s": time.perf_counter() - start})
+
+    step_end = time.perf_counter() + seconds
+    next_at = time.perf_counter()
+    while next_at < step_end:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        name = workload.resolve(random.choices(names, probs)[0])
+        if len(inflight) >= max_inflight:
+            records.append({"endpoint": name, "status": "client_overflow", "latency_s": 0.0})
+        else:
+            task = asyncio.create_task(one(name))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        next_at += random.expovariate(rate)
+
+    if inflight:
+        await asyncio.wait(inflight)
+    return records
+
+
+def percentile(ordered: list, p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+
+
+def summarize_step(records: list, rate: float, seconds: float) -> dict:
+    endpoints = {}
+    for name in ENDPOINTS:
+        rs = [r for r in records if r["endpoint"] == name]
+        if not rs:
+            continue
+        ok = sorted(r["latency_s"] for r in rs if r["status"] == 200)
+        shed = sum(1 for r in rs if r["status"] == 503)
+        errors = sum(1 for r in rs if r["status"] != 200)
+        endpoints[name] = {
+            "calls": len(rs),
+            "items": len(ok),
+            "errors": errors,
+            "shed_503": shed,
+            "mean_s": sum(ok) / len(ok) if ok else 0.0,
+            "p50_s": percentile(ok, 0.50),
+            "p95_s": percentile(ok, 0.95),
+            "p99_s": percentile(ok, 0.99),
+            "items_per_s": len(ok) / seconds,
+        }
+
+    total = len(records)
+    ok_total = sum(e["items"] for e in endpoints.values())
+    return {
+        "offered_rps": rate,
+        "achieved_rps": ok_total / seconds,
+        "requests": total,
+        "error_rate": (total - ok_total) / total if total else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def is_saturated(step: dict, args) -> list:
+    reasons = []
+    if step["achieved_rps"] < args.min_goodput * step["offered_rps"]:
+        reasons.append(f"goodput {step['achieved_rps']:.2f} < {args.min_goodput:.0%} of {step['offered_rps']}")
+    if step["error_rate"] > args.max_error_rate:
+        reasons.append(f"error rate {step['error_rate']:.1%}")
+    if args.slo_p99:
+        for name, e in step["endpoints"].items():
+            if e["items"] and e["p99_s"] > args.slo_p99:
+                reasons.append(f"{name} p99 {e['p99_s']:.2f}s")
+    return reasons
+
+
+def format_report(results: dict) -> str:
+    lines = [f"{'rps':>6} {'endpoint':<10}{'calls':>7}{'ok/s':>8}{'errors':>8}{'503':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for step in results["steps"]:
+        for name, e in step["endpoints"].items():
+            lines.append(
+                f"{step['offered_rps']:>6g} {name:<10}{e['calls']:>7}{e['items_per_s']:>8.2f}{e['errors']:>8}{e['shed_503']:>6}"
+                f"{e['p50_s'] * 1000:>10.0f}{e['p95_s'] * 1000:>10.0f}{e['p99_s'] * 1000:>10.0f}"
+            )
+        flag = f"  SATURATED: {'; '.join(step['saturated'])}" if step["saturated"] else ""
+        lines.append(f"{'':>6} total: {step['achieved_rps']:.2f} ok/s of {step['offered_rps']:g} offered, {step['error_rate']:.1%} errors{flag}")
+
+    sat = results["saturation"]
+    lines.append("")
+    lines.append(f"max sustained rate: {sat['max_sustained_rps']} rps; saturation at: {sat['saturation_rps']} rps")
+    return "\n".join(lines)
+
+
+async def drive(args, base_url: str) -> list:
+    samples = load_samples()
+    simplify_text = next((d.decode("utf-8", "ignore") for n, d, _ in samples if n.endswith(".txt")), "")[:4000] \
+        or "The lessee shall not sublet the premises without prior written consent."
+    weights = {k: float(v) for k, v in (kv.split("=") for kv in args.mix.split(","))}
+    unknown = set(weights) - set(ENDPOINTS)
+    if unknown:
+        raise ValueError(f"unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        workload = Workload(client, samples, simplify_text)
+        await workload.login()
+        print(f"seeding {args.seed_docs} documents...", file=sys.stderr)
+        await workload.seed(args.seed_docs, args.startup_timeout)
+
+        steps = []
+        for rate in [float(r) for r in args.rates.split(",")]:
+            print(f"step {rate:g} rps for {args.step_seconds}s...", file=sys.stderr)
+            records = await run_step(workload, weights, rate, args.step_seconds, args.max_inflight)
+            step = summarize_step(records, rate, args.step_seconds)
+            step["saturated"] = is_saturated(step, args)
+            steps.append(step)
+            if step["saturated"] and args.stop_at_saturation:
+                break
+        return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end API load test")
+    parser.add_argument("--rates", default="0.5,1,2,4,8", help="comma separated arrival rates (requests/s)")
+    parser.add_argument("--step-seconds", type=float, default=60)
+    parser.add_argument("--mix", default="upload=1,status=4,qa=4,summarize=0.5,simplify=1", help="endpoint=weight,...")
+    parser.add_argument("--seed-docs", type=int, default=3, help="documents uploaded (and awaited) before the first step")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--llm-jitter", type=float, default=0.4)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--mongodb-uri", help="use this MongoDB instead of starting a local mongod")
+    parser.add_argument("--mongod", default="mongod", help="mongod binary")
+    parser.add_argument("--no-artifacts", action="store_true", help="disable precomputed summaries/simplifications")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--min-goodput", type=float, default=0.9)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--slo-p99", type=float, help="per-endpoint p99 limit (s)")
+    parser.add_argument("--stop-at-saturation", action="store_true")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="legalease-load-")
+    mongod = api = stub = None
+    try:
+        mongodb_uri = args.mongodb_uri
+        if not mongodb_uri:
+            mongod, mongodb_uri = start_mongod(args.mongod, workdir)
+        stub = start_stub(0, args.llm_latency, args.llm_jitter, args.llm_error_rate)
+        llm_url = f"http://127.0.0.1:{stub.server_address[1]}/v1/chat/completions"
+        print(f"starting API (logs in {workdir})...", file=sys.stderr)
+        api, base_url = start_api(args, workdir, mongodb_uri, llm_url)
+        steps = asyncio.run(drive(args, base_url))
+    finally:
+        stop(api)
+        stop(mongod)
+        if stub:
+            stub.shutdown()
+
+    sustained = [s["offered_rps"] for s in steps if not s["saturated"]]
+    saturated = [s["offered_rps"] for s in steps if s["saturated"]]
+    results = {
+        "created_at": datetime.utcnow().isoformat(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "steps": steps,
+        "saturation": {
+            "max_sustained_rps": max(sustained) if sustained else None,
+            "saturation_rps": min(saturated) if saturated else None,
+        },
+        # flat per-endpoint view so benchmarks.compare can diff runs
+        "stages": {
+            f"{name}@{s['offered_rps']:g}rps": e
+            for s in steps for name, e in s["endpoints"].items()
+        },
+    }
+
+    if args.output:
+        save_results(results, args.output)
+
+    print(format_report(results))
+
+    regressions = None
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        print("")
+        print("No regressions against baseline." if not regressions else "\n".join(
+            f"REGRESSION {r['stage']}.{r['metric']}: {r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.1%})"
+            for r in regressions
+        ))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
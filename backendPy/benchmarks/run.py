@@ -0,0 +1,228 @@
+# benchmarks/run.py
+"""
+Offline benchmark of the ingestion and query pipeline on sample_contracts.
+
+    cd backendPy
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.15
+
+Models must already be in the local Hugging Face cache; nothing here talks
+to the network, MongoDB or OpenRouter. A stage that cannot run (missing
+model, missing package) is recorded as skipped instead of failing the run.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+
+# offline + throwaway settings, before anything imports config
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+_SCRATCH = tempfile.mkdtemp(prefix="legalease-bench-")
+for _name in ("UPLOAD_DIR", "INDEX_DIR", "CHUNKS_DIR"):
+    os.environ.setdefault(_name, os.path.join(_SCRATCH, _name.lower()))
+
+from benchmarks.compare import compare, format_report, load_results, save_results
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_contracts")
+
+QUERIES = [
+    "What is the notice period for termination?",
+    "Which law governs this agreement?",
+    "What is the duration of the confidentiality obligation?",
+    "What is the salary or remuneration?",
+    "Where is the jurisdiction for disputes?",
+    "Can the employee work for a competitor?",
+    "Who owns the intellectual property created?",
+    "What happens to confidential information on termination?",
+]
+
+ALL_STAGES = [
+    "extract_pypdf", "extract_pdfplumber", "clean_text", "simplify_text", "chunk_langchain", "chunk_clause",
+    "embed", "faiss_build", "faiss_search", "summarize_text",
+]
+
+
+# -----------------------------
+# helpers
+# -----------------------------
+def measure(fn, inputs, repeat=1, count=lambda x: 1) -> dict:
+    latencies = []
+    items = 0
+    for _ in range(repeat):
+        for x in inputs:
+            start = time.perf_counter()
+            fn(x)
+            latencies.append(time.perf_counter() - start)
+            items += count(x)
+
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "items": items,
+        "total_s": total,
+        "mean_s": total / len(latencies),
+        "p50_s": statistics.median(ordered),
+        "p95_s": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "items_per_s": items / total if total else 0.0,
+    }
+
+
+def load_corpus(scale: int = 1):
+    """
+    Returns (pdf_paths, texts). Texts come from the lightweight extractors so
+    loading the corpus does not pull in the embedding model.
+    """
+    from summarize.pdf_utils import extract_text_from_pdf
+    from summarize.text_utils import extract_text_from_txt
+
+    pdf_paths = sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.pdf")))
+    texts = []
+    for path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        if path.endswith(".pdf"):
+            texts.append(extract_text_from_pdf(data))
+        elif path.endswith(".txt"):
+            texts.append(extract_text_from_txt(data))
+
+    texts = [t for t in texts if t]
+    if scale > 1:
+        texts = ["\n\n".join([t] * scale) for t in texts]
+    return pdf_paths, texts
+
+
+# -----------------------------
+# stages
+# -----------------------------
+def run_stages(stages, repeat, batch_sizes, scale):
+    pdf_paths, texts = load_corpus(scale)
+    chars = lambda t: len(t)
+    results = {}
+    state = {}
+
+    def stage(name, fn):
+        if name.split(":")[0] not in stages:
+            return
+        print(f"running {name}...", file=sys.stderr)
+        try:
+            results[name] = fn()
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    def extract_pypdf():
+        from summarize.pdf_utils import extract_text_from_pdf
+
+        def run(path):
+            with open(path, "rb") as f:
+                extract_text_from_pdf(f.read())
+        return measure(run, pdf_paths, repeat)
+
+    def extract_pdfplumber():
+        from extraction import extract_text_from_file
+        return measure(extract_text_from_file, pdf_paths, repeat)
+
+    def clean():
+        from summarize.model import clean_text
+        return {**measure(clean_text, texts, repeat), "chars": sum(map(chars, texts))}
+
+    def simplify():
+        from simplification.model import simplify_text
+        return measure(simplify_text, texts, repeat)
+
+    def chunk(name):
+        from extraction import splitter
+        from chunker import chunk_offsets
+        fn = splitter.split_text if name == "langchain" else chunk_offsets
+        return {**measure(fn, texts, repeat), "chars": sum(map(chars, texts))}
+
+    def embed(batch_size):
+        from utils import embed_chunks
+        from extraction import chunk_text
+        chunks = state.get("chunks") or [chunk_text(t) for t in texts]
+        state["chunks"] = chunks
+        result = measure(lambda c: embed_chunks(c, batch_size=batch_size), chunks, repeat, count=len)
+        state["embeddings"] = [embed_chunks(c, batch_size=batch_size) for c in chunks]
+        return result
+
+    def faiss_build():
+        from utils import build_faiss_index
+        embeddings = state["embeddings"]
+        state["indexes"] = [build_faiss_index(e) for e in embeddings]
+        return measure(build_faiss_index, embeddings, repeat, count=len)
+
+    def faiss_search():
+        from utils import embed_query
+        q_embs = [embed_query(q) for q in QUERIES]
+        indexes = state["indexes"]
+
+        def run(index):
+            for q in q_embs:
+                index.search(q, min(20, index.ntotal))
+        return measure(run, indexes, repeat, count=lambda _: len(q_embs))
+
+    def summarize():
+        from summarize.model import load_summarizer, summarize_text
+        tokenizer, model = load_summarizer()
+        return measure(lambda t: summarize_text(t, tokenizer, model), texts, 1)
+
+    stage("extract_pypdf", extract_pypdf)
+    stage("extract_pdfplumber", extract_pdfplumber)
+    stage("clean_text", clean)
+    stage("simplify_text", simplify)
+    stage("chunk_langchain", lambda: chunk("langchain"))
+    stage("chunk_clause", lambda: chunk("clause"))
+    for b in batch_sizes:
+        stage(f"embed:batch_{b}", lambda b=b: embed(b))
+    if "embeddings" in state:
+        stage("faiss_build", faiss_build)
+    if "indexes" in state:
+        stage("faiss_search", faiss_search)
+    stage("summarize_text", summarize)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark")
+    parser.add_argument("--stages", default=",".join(ALL_STAGES), help="comma separated subset of: " + ", ".join(ALL_STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-sizes", default="8,16,32,64")
+    parser.add_argument("--scale", type=int, default=1, help="concatenate each document N times to simulate long contracts")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging (fraction)")
+    args = parser.parse_args(argv)
+
+    stages = set(args.stages.split(","))
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+
+    results = {
+        "created_at": datetime.utcnow().isoformat(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {"repeat": args.repeat, "batch_sizes": batch_sizes, "scale": args.scale},
+        "stages": run_stages(stages, args.repeat, batch_sizes, args.scale),
+    }
+
+    if args.output:
+        save_results(results, args.output)
+
+    regressions = None
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+
+    print(format_report(results, regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# benchmarks/stub_llm.py
+"""
+Stand-in for an OpenAI-style chat-completions endpoint with configurable
+latency, for load tests that must not call OpenRouter.
+
+    cd backendPy
+    python -m benchmarks.stub_llm --port 8099 --latency 0.8 --jitter 0.4
+
+Point the API at it with GENERATION_BACKENDS='["local"]' and
+LOCAL_LLM_BASE_URL=http://127.0.0.1:8099/v1/chat/completions.
+
+Requests with "stream": true get Server-Sent Events: the first token after
+the latency above, then one word every --token-delay seconds.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = "According to the provided context, the clause applies as written. [stub answer]"
+
+
+def make_handler(latency: float, jitter: float, error_rate: float, token_delay: float = 0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                request = {}
+
+            # latency ~ base + exponential tail, like a real provider
+            time.sleep(latency + (random.expovariate(1 / jitter) if jitter > 0 else 0))
+
+            if random.random() < error_rate:
+                return self._send(503, {"error": {"message": "stub overloaded"}})
+
+            if request.get("stream"):
+                return self._stream(request.get("model", "stub"))
+
+            prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in request.get("messages", []))
+            self._send(200, {
+                "id": "stub",
+                "object": "chat.completion",
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(ANSWER.split())},
+            })
+
+        def _stream(self, model: str):
+            # chunked like real providers, so clients see each event as it is sent
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = ANSWER.split(" ")
+            try:
+                for i, word in enumerate(words):
+                    if i:
+                        time.sleep(token_delay)
+                    chunk = {
+                        "id": "stub",
+                        "object": "chat.completion.chunk",
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+                    }
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # client cancelled
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _send(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub(
+    port: int = 0, latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0, token_delay: float = 0.02
+) -> ThreadingHTTPServer:
+    """
+    Serve in a daemon thread; returns the server (server.server_address[1]
+    is the port when port=0). Call server.shutdown() to stop.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, jitter, error_rate, token_delay))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub chat-completions server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5, help="base latency per completion (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean of the extra exponential latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="delay between streamed words (s)")
+    args = parser.parse_args(argv)
+
+    server = start_stub(args.port, args.latency, args.jitter, args.error_rate, args.token_delay)
+    print(f"stub LLM on http://127.0.0.1:{server.server_address[1]}/v1/chat/completions", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
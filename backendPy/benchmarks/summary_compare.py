@@ -0,0 +1,120 @@
+# benchmarks/summary_compare.py
+"""
+Latency and ROUGE of extractive pre-selection vs. summarizing every chunk,
+on sample_contracts.
+
+    cd backendPy
+    python -m benchmarks.summary_compare --scale 4 --output summaries.json
+
+There are no reference summaries for the sample contracts, so ROUGE is
+reported two ways: the extractive summary against the full-path summary
+(how much of the current output is kept), and each summary against the
+source text (ROUGE recall = content coverage).
+"""
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.run import load_corpus
+from benchmarks.compare import save_results
+
+
+def _tokens(text: str):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _prf(overlap: int, cand: int, ref: int) -> dict:
+    p = overlap / cand if cand else 0.0
+    r = overlap / ref if ref else 0.0
+    return {"p": p, "r": r, "f": 2 * p * r / (p + r) if p + r else 0.0}
+
+
+def rouge_n(candidate: str, reference: str, n: int) -> dict:
+    def grams(tokens):
+        return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    c, r = grams(_tokens(candidate)), grams(_tokens(reference))
+    return _prf(sum((c & r).values()), sum(c.values()), sum(r.values()))
+
+
+def rouge_l(candidate: str, reference: str) -> dict:
+    c, r = _tokens(candidate), _tokens(reference)
+    prev = [0] * (len(r) + 1)
+    for x in c:
+        cur = [0]
+        for j, y in enumerate(r):
+            cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+        prev = cur
+    return _prf(prev[-1], len(c), len(r))
+
+
+def rouge(candidate: str, reference: str) -> dict:
+    return {
+        "rouge1": rouge_n(candidate, reference, 1),
+        "rouge2": rouge_n(candidate, reference, 2),
+        "rougeL": rouge_l(candidate, reference),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extractive pre-selection vs full summarization")
+    parser.add_argument("--scale", type=int, default=4, help="concatenate each document N times so it takes the long-document path")
+    parser.add_argument("--token-budget", type=int, default=3600)
+    parser.add_argument("--no-embeddings", action="store_true", help="rank with lexical TextRank instead of e5 centroid")
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+
+    from summarize.model import load_summarizer, summarize_text, clean_text
+    tokenizer, model = load_summarizer()
+    embed_fn = None
+    if not args.no_embeddings:
+        from utils import embed_chunks
+        embed_fn = embed_chunks
+
+    _, texts = load_corpus(args.scale)
+    docs = []
+    for i, text in enumerate(texts):
+        start = time.perf_counter()
+        full = summarize_text(text, tokenizer, model, extractive=False)
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        extractive = summarize_text(text, tokenizer, model, extractive=True, token_budget=args.token_budget, embed_fn=embed_fn)
+        extractive_s = time.perf_counter() - start
+
+        source = clean_text(text)
+        docs.append({
+            "doc": i,
+            "chars": len(text),
+            "full": {"seconds": full_s, "words": len(full.split()), "vs_source": rouge(full, source)},
+            "extractive": {
+                "seconds": extractive_s,
+                "words": len(extractive.split()),
+                "vs_source": rouge(extractive, source),
+                "vs_full": rouge(extractive, full),
+            },
+        })
+        print(
+            f"doc {i}: full {full_s:.1f}s/{len(full.split())}w  extractive {extractive_s:.1f}s/{len(extractive.split())}w  "
+            f"R1-F vs full {docs[-1]['extractive']['vs_full']['rouge1']['f']:.3f}  "
+            f"R1-R vs source {docs[-1]['full']['vs_source']['rouge1']['r']:.3f} -> {docs[-1]['extractive']['vs_source']['rouge1']['r']:.3f}"
+        )
+
+    total_full = sum(d["full"]["seconds"] for d in docs)
+    total_ext = sum(d["extractive"]["seconds"] for d in docs)
+    print(f"total: full {total_full:.1f}s, extractive {total_ext:.1f}s ({total_full / max(total_ext, 1e-9):.2f}x faster)")
+
+    if args.output:
+        save_results({
+            "created_at": datetime.utcnow().isoformat(),
+            "params": vars(args),
+            "docs": docs,
+            "totals": {"full_s": total_full, "extractive_s": total_ext},
+        }, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
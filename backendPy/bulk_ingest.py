@@ -0,0 +1,307 @@
+# bulk_ingest.py
+"""
+Bulk ingestion of a zip archive or a directory of contracts.
+
+    cd backendPy
+    python -m bulk_ingest contracts.zip --user-id <user id> --checkpoint contracts.ckpt.json
+
+Documents are handled in windows of BULK_WINDOW_DOCS: extraction + chunking
+run in a process pool, the chunks of the whole window are embedded together
+in large shared batches and split back into per-document indexes and chunk
+stores, and Mongo records are written with bulk_write. The checkpoint file
+records finished sources so an interrupted run resumes where it stopped.
+Document ids are allocated and saved to the checkpoint before a window is
+processed, so a source that is retried reuses its record and file.
+
+Archive members are capped at MAX_UPLOAD_BYTES each (the single-upload limit)
+and BULK_MAX_EXTRACTED_BYTES in total, checked against the declared sizes up
+front and against the bytes actually decompressed while copying.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import multiprocessing
+from datetime import datetime
+
+from bson import ObjectId
+from concurrent.futures import ProcessPoolExecutor
+
+from config import settings
+from extraction import ALLOWED, extract_and_chunk
+
+# heavy modules (embedder, Mongo) are imported inside ingest() so that
+# spawned extraction workers only ever load extraction.py
+
+
+# -----------------------------
+# Sources
+# -----------------------------
+def list_sources(path: str) -> list:
+    """
+    Sorted keys of ingestible files: member names for a zip archive, relative
+    paths for a directory. Raises ValueError when the archive declares more
+    than BULK_MAX_EXTRACTED_BYTES of content.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            members = [i for i in zf.infolist() if not i.is_dir()]
+        declared = sum(i.file_size for i in members)
+        if declared > settings.BULK_MAX_EXTRACTED_BYTES:
+            raise ValueError(
+                f"Archive expands to {declared} bytes (limit {settings.BULK_MAX_EXTRACTED_BYTES})"
+            )
+        names = [i.filename for i in members]
+    elif os.path.isdir(path):
+        names = [
+            os.path.relpath(os.path.join(root, f), path)
+            for root, _, files in os.walk(path)
+            for f in files
+        ]
+    else:
+        raise ValueError(f"{path} is neither a zip archive nor a directory")
+
+    return sorted(
+        n for n in names
+        if os.path.splitext(n)[1].lower() in ALLOWED and not os.path.basename(n).startswith(".")
+    )
+
+
+def materialize(path: str, key: str, dest_path: str):
+    # copy one source into UPLOAD_DIR so file_path works like a normal upload
+    if os.path.isdir(path):
+        shutil.copyfile(os.path.join(path, key), dest_path)
+        return
+    limit = settings.MAX_UPLOAD_BYTES
+    with zipfile.ZipFile(path) as zf:
+        if zf.getinfo(key).file_size > limit:
+            raise ValueError(f"{key} is larger than {limit} bytes uncompressed")
+        # declared sizes can lie: count what is actually decompressed
+        written = 0
+        with zf.open(key) as src, open(dest_path, "wb") as dst:
+            while True:
+                block = src.read(settings.UPLOAD_CHUNK_BYTES)
+                if not block:
+                    break
+                written += len(block)
+                if written > limit:
+                    raise ValueError(f"{key} is larger than {limit} bytes uncompressed")
+                dst.write(block)
+
+
+# -----------------------------
+# Checkpoint
+# -----------------------------
+class Checkpoint:
+    def __init__(self, path: str = None):
+        self.path = path
+        self.done = {}       # source key -> document_id
+        self.failed = {}     # source key -> error
+        self.allocated = {}  # source key -> document_id, for sources not done yet
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.done = data.get("done", {})
+            self.failed = data.get("failed", {})
+            self.allocated = data.get("allocated", {})
+
+    def allocate(self, key: str) -> str:
+        # the same source keeps the same document id across retries
+        if key not in self.allocated:
+            self.allocated[key] = str(ObjectId())
+        return self.allocated[key]
+
+    def record(self, key: str, document_id: str, error: str = None):
+        if error:
+            self.failed[key] = error
+        else:
+            self.done[key] = document_id
+            self.failed.pop(key, None)
+            self.allocated.pop(key, None)
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"done": self.done, "failed": self.failed, "allocated": self.allocated}, f)
+        os.replace(tmp, self.path)
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+def ingest(path: str, user_id: str, checkpoint_path: str = None, workers: int = None, progress=None) -> dict:
+    """
+    Ingest every supported file under `path` for `user_id`.
+
+    progress(report: dict) is called after every window with
+    {"total", "done", "failed", "skipped", "elapsed_s"}.
+    """
+    from pymongo import UpdateOne
+    from db import documents_col
+    from utils import embed_chunks, store_document_index
+    from metrics import track_stage
+    from artifacts import artifact_worker, pending_fields, enabled_artifacts
+    from clause_map import build_clause_map
+    from status_events import status_bus
+
+    checkpoint = Checkpoint(checkpoint_path)
+    sources = list_sources(path)
+    pending = [k for k in sources if k not in checkpoint.done]
+    report = {"total": len(sources), "done": len(sources) - len(pending), "failed": 0, "skipped": len(sources) - len(pending)}
+    started = time.time()
+
+    workers = workers or settings.BULK_EXTRACT_WORKERS or os.cpu_count()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+    try:
+        for w in range(0, len(pending), settings.BULK_WINDOW_DOCS):
+            window = pending[w:w + settings.BULK_WINDOW_DOCS]
+            window_timings = {}
+            now = datetime.utcnow()
+
+            # 1. ids saved before any work, then one bulk upsert for the window's records
+            ids = [ObjectId(checkpoint.allocate(key)) for key in window]
+            checkpoint.save()
+            documents_col.bulk_write([
+                UpdateOne({"_id": _id}, {
+                    "$set": {
+                        "filename": os.path.basename(key),
+                        "user_id": user_id,
+                        "status": "PROCESSING",
+                        "source": key,
+                        "updated_at": now,
+                    },
+                    "$unset": {"error": ""},
+                    "$setOnInsert": {"created_at": now},
+                }, upsert=True)
+                for key, _id in zip(window, ids)
+            ], ordered=False)
+            for _id in ids:
+                status_bus.publish(user_id, str(_id), status="PROCESSING")
+
+            file_paths = []
+            copy_errors = {}
+            for i, (key, _id) in enumerate(zip(window, ids)):
+                dest = os.path.join(settings.UPLOAD_DIR, f"{_id}{os.path.splitext(key)[1].lower()}")
+                try:
+                    materialize(path, key, dest)
+                except (ValueError, OSError, zipfile.BadZipFile) as e:
+                    copy_errors[i] = e
+                file_paths.append(dest)
+
+            # 2. parallel extraction + chunking
+            with track_stage("extraction", window_timings):
+                futures = [
+                    None if i in copy_errors else pool.submit(extract_and_chunk, p)
+                    for i, p in enumerate(file_paths)
+                ]
+                results = []
+                for i, f in enumerate(futures):
+                    if f is None:
+                        results.append(copy_errors[i])
+                        continue
+                    try:
+                        results.append(f.result())
+                    except Exception as e:
+                        results.append(e)
+
+            # 3. one shared embedding pass over every chunk in the window
+            ok = [i for i, r in enumerate(results) if not isinstance(r, Exception) and r[0]]
+            all_chunks = [c for i in ok for c in results[i][0]]
+            embeddings = None
+            if all_chunks:
+                with track_stage("embedding", window_timings):
+                    embeddings = embed_chunks(all_chunks, batch_size=settings.BULK_EMBED_BATCH_SIZE)
+
+            # 4. split back into per-document indexes + chunk stores
+            updates = []
+            events = []  # (document_id, fields) pushed to status streams after the bulk_write
+            cursor = 0
+            for i, (key, _id, file_path) in enumerate(zip(window, ids, file_paths)):
+                result = results[i]
+                if isinstance(result, Exception) or not result[0]:
+                    error = str(result) if isinstance(result, Exception) else "No text found in file"
+                    updates.append(UpdateOne({"_id": _id}, {"$set": {
+                        "status": "FAILED", "error": error, "file_path": file_path, "updated_at": datetime.utcnow()
+                    }}))
+                    events.append((str(_id), {"status": "FAILED", "error": error}))
+                    checkpoint.record(key, str(_id), error)
+                    report["failed"] += 1
+                    continue
+
+                chunks, offsets, _, extract_seconds = result
+                doc_embeddings = embeddings[cursor:cursor + len(chunks)]
+                cursor += len(chunks)
+                # the embedding pass is shared by the window; each document gets its share by chunk count
+                timings = {
+                    "extraction": extract_seconds,
+                    "embedding": round(window_timings["embedding"] * len(chunks) / len(all_chunks), 4),
+                }
+                with track_stage("indexing", timings):
+                    store_document_index(str(_id), chunks, offsets, doc_embeddings)
+                with track_stage("clause_map", timings):
+                    clause_map = build_clause_map(chunks, doc_embeddings, offsets)
+
+                updates.append(UpdateOne({"_id": _id}, {"$set": {
+                    "status": "READY",
+                    "chunks_count": len(chunks),
+                    "file_path": file_path,
+                    "stage_durations": timings,
+                    "clause_map": clause_map,
+                    "updated_at": datetime.utcnow(),
+                    **pending_fields(),
+                }}))
+                events.append((str(_id), {
+                    "status": "READY",
+                    "chunks_count": len(chunks),
+                    "artifacts": {k: "PENDING" for k in enabled_artifacts()},
+                }))
+                checkpoint.record(key, str(_id))
+                report["done"] += 1
+
+            # 5. one bulk_write for the window's final states
+            if updates:
+                documents_col.bulk_write(updates, ordered=False)
+            checkpoint.save()
+            for document_id, fields in events:
+                status_bus.publish(user_id, document_id, **fields)
+
+            # artifacts re-extract from file_path on the server's artifact worker;
+            # from the CLI they stay PENDING until the server next starts
+            for i in ok:
+                artifact_worker.submit(str(ids[i]), file_paths[i])
+
+            report["elapsed_s"] = round(time.time() - started, 2)
+            if progress:
+                progress(dict(report))
+    finally:
+        pool.shutdown()
+
+    report["elapsed_s"] = round(time.time() - started, 2)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest a zip archive or directory of contracts")
+    parser.add_argument("path", help="zip archive or directory")
+    parser.add_argument("--user-id", required=True, help="owner of the ingested documents")
+    parser.add_argument("--checkpoint", help="checkpoint file; rerun with the same file to resume")
+    parser.add_argument("--workers", type=int, help="extraction processes (default: BULK_EXTRACT_WORKERS or CPU count)")
+    args = parser.parse_args(argv)
+
+    def progress(r):
+        print(f"[{r['elapsed_s']:>8.1f}s] {r['done']}/{r['total']} done, {r['failed']} failed", file=sys.stderr)
+
+    report = ingest(args.path, args.user_id, checkpoint_path=args.checkpoint, workers=args.workers, progress=progress)
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
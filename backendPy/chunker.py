@@ -0,0 +1,121 @@
+# chunker.py
+import re
+from collections.abc import Sequence
+
+import numpy as np
+
+# Break points, best first. A chunk ends at the furthest break of the best
+# priority that fits in chunk_size; a break is the index where the next chunk
+# starts (headings keep their "Clause 4" / "12." prefix). Paragraph and heading
+# breaks are found with one regex pass over the text; line, sentence and word
+# breaks are looked up inside each window with str.rfind.
+# (both alternatives start at "\n" so the regex engine can skip ahead to it)
+_STRUCTURE = re.compile(
+    r"\n(?:(?P<paragraph>[ \t]*\n\s*)"
+    r"|(?P<heading>[ \t]*(?=(?:Clause|Section|Article|Paragraph|CLAUSE|SECTION|ARTICLE)\s+[\dIVXivx]|\d{1,3}(?:\.\d{1,3})*[.)]\s)))"
+)
+_SENTENCE_ENDS = (". ", "; ", ": ", "? ", "! ")
+
+
+def _structure_breaks(text: str):
+    paragraphs, headings = [], []
+    for m in _STRUCTURE.finditer(text):
+        (paragraphs if m.lastgroup == "paragraph" else headings).append(m.end())
+    return paragraphs, headings
+
+
+def _last_before(pos: list, cursor: int, limit: int):
+    # advance cursor past every break <= limit; returns (cursor, last break or -1)
+    while cursor < len(pos) and pos[cursor] <= limit:
+        cursor += 1
+    return cursor, (pos[cursor - 1] if cursor else -1)
+
+
+def _window_break(text: str, floor: int, limit: int) -> int:
+    i = text.rfind("\n", floor, limit)
+    if i != -1:
+        return i + 1
+    i = max(text.rfind(p, floor, limit) for p in _SENTENCE_ENDS)
+    if i != -1:
+        return i + 2
+    i = text.rfind(" ", floor, limit)
+    if i != -1:
+        return i + 1
+    return limit
+
+
+def chunk_offsets(text: str, chunk_size: int = 800, chunk_overlap: int = 150) -> np.ndarray:
+    """
+    Split text into chunks of at most chunk_size characters, preferring
+    paragraph breaks, then legal headings (Clause/Section/Article/Paragraph,
+    numbered headings), then lines, sentences and words. Consecutive chunks
+    overlap by up to chunk_overlap characters, starting on a word boundary.
+
+    Single forward pass: structural break cursors only move forward and each
+    window is scanned once, so the cost is linear in len(text). Returns an
+    int64 array of (start, end) offsets; chunks are text[start:end] with
+    surrounding whitespace trimmed.
+    """
+    n = len(text)
+    paragraphs, headings = _structure_breaks(text)
+    p_cur = h_cur = 0
+
+    offsets = []
+    start = _skip_space(text, 0, n)
+    while start < n:
+        limit = start + chunk_size
+        floor = start + chunk_overlap + 1
+        if limit >= n:
+            end = n
+        else:
+            p_cur, end = _last_before(paragraphs, p_cur, limit)
+            if end <= floor:
+                h_cur, end = _last_before(headings, h_cur, limit)
+            if end <= floor:
+                end = _window_break(text, floor, limit)
+
+        stop = _trim_end(text, start, end)
+        if stop > start:
+            offsets.append((start, stop))
+        if end >= n:
+            break
+
+        # next chunk starts up to chunk_overlap characters back, on a word boundary
+        back = max(end - chunk_overlap, start + 1)
+        space = text.find(" ", back - 1, end)
+        nxt = space + 1 if space != -1 and space + 1 < end else end
+        start = _skip_space(text, nxt, n)
+
+    return np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+
+
+def _skip_space(text: str, i: int, n: int) -> int:
+    while i < n and text[i].isspace():
+        i += 1
+    return i
+
+
+def _trim_end(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+class ChunkView(Sequence):
+    """
+    Read-only list of chunks backed by the document text and an offsets
+    array; each chunk is sliced only when accessed.
+    """
+
+    def __init__(self, text: str, offsets):
+        self.text = text
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        start, end = self.offsets[i]
+        return self.text[start:end]
@@ -0,0 +1,263 @@
+# clause_map.py
+"""
+Per-document map of standard clause types (governing law, jurisdiction,
+termination notice, confidentiality term, remuneration), built at ingestion
+from the chunk embeddings already computed for the FAISS index.
+
+A chunk is mapped to a clause type when
+  - it contains at least one of the type's multi-word phrases (partly taken
+    from the uslt_rules phrase list), and
+  - its e5 similarity to the type's prototype clauses is at least
+    CLAUSE_MAP_MIN_SIMILARITY and beats its similarity to generic contract
+    boilerplate by CLAUSE_MAP_MIN_MARGIN. e5 puts almost any two contract
+    sentences above 0.7, so the margin does most of the work.
+For each mapped chunk the sentence with the most phrase matches is kept as
+the clause span; the best CLAUSE_MAP_MAX_SPANS per type are stored on the
+document record.
+
+/qa/ask matches the question embedding the same way against prototype
+questions (margin over generic questions); a close match on a mapped type is
+answered with the clause span, without retrieval or an LLM call.
+"""
+import re
+import threading
+
+import numpy as np
+
+from config import settings
+from simplification.uslt_rules import LEGAL_SIMPLIFICATION_RULES
+
+
+def _phrases(*phrases) -> tuple:
+    # single words ("notice", "fee") match far too many chunks
+    return tuple(p for p in phrases if " " in p)
+
+
+def _uslt(*phrases) -> tuple:
+    # phrases shared with the simplification rules; missing ones are ignored
+    return _phrases(*(p for p in phrases if p in LEGAL_SIMPLIFICATION_RULES))
+
+
+CLAUSE_TYPES = {
+    "governing_law": {
+        "questions": [
+            "Which law governs this agreement?",
+            "What is the governing law of this contract?",
+            "Under the laws of which country or state is this agreement construed?",
+        ],
+        "prototypes": [
+            "This Agreement shall be governed by and construed in accordance with the laws of India.",
+            "The validity, interpretation and performance of this Agreement shall be governed by the laws of the State.",
+        ],
+        "phrases": _uslt("governed by the laws of") + _phrases(
+            "governing law", "governed by and construed", "construed in accordance with the laws",
+        ),
+    },
+    "jurisdiction": {
+        "questions": [
+            "Where is the jurisdiction for disputes?",
+            "Which courts have jurisdiction over disputes under this agreement?",
+            "How are disputes resolved and where?",
+        ],
+        "prototypes": [
+            "The courts at Mumbai shall have exclusive jurisdiction over any dispute arising out of this Agreement.",
+            "Any dispute shall be settled through arbitration and the venue of arbitration shall be New Delhi.",
+        ],
+        "phrases": _uslt("exclusive jurisdiction", "settled through arbitration", "venue of arbitration") + _phrases(
+            "subject to the jurisdiction", "jurisdiction of the courts", "seat of arbitration",
+            "referred to arbitration", "arbitration and conciliation act",
+        ),
+    },
+    "termination_notice": {
+        "questions": [
+            "What is the notice period for termination?",
+            "How much notice is required to terminate this agreement?",
+            "How can this agreement be terminated?",
+        ],
+        "prototypes": [
+            "Either party may terminate this Agreement by giving thirty days prior written notice to the other party.",
+            "The employment may be terminated by either party on giving one month notice period or salary in lieu thereof.",
+        ],
+        "phrases": _uslt(
+            "notice period", "prior written notice", "termination of this agreement",
+            "terminate employment", "termination of employment",
+        ) + _phrases(
+            "days notice", "days' notice", "days written notice", "months notice", "month's notice",
+            "notice of termination", "may terminate this agreement", "in lieu of notice",
+        ),
+    },
+    "confidentiality_term": {
+        "questions": [
+            "What is the duration of the confidentiality obligation?",
+            "How long does the confidentiality obligation last?",
+            "Does confidentiality survive termination?",
+        ],
+        "prototypes": [
+            "The obligations of confidentiality shall survive for a period of five years after the termination of this Agreement.",
+            "The Receiving Party shall keep the Confidential Information secret during the term and for three years thereafter.",
+        ],
+        "phrases": _uslt("confidential information", "shall survive termination", "shall protect the confidentiality")
+        + _phrases("obligations of confidentiality", "confidentiality obligations", "keep confidential", "survive the termination"),
+    },
+    "remuneration": {
+        "questions": [
+            "What is the salary or remuneration?",
+            "How much will the employee be paid?",
+            "What are the fees or compensation payable?",
+        ],
+        "prototypes": [
+            "The Employee shall be paid a monthly salary of Rs. 50,000 as remuneration for the services rendered.",
+            "In consideration of the services, the Company shall pay the Consultant a fee of Rs. 10,000 per month.",
+        ],
+        "phrases": _phrases(
+            "monthly salary", "annual salary", "gross salary", "salary of", "cost to company",
+            "remuneration of", "fee of", "fees of", "professional fees", "shall be paid",
+            "per month", "per annum",
+        ),
+    },
+}
+
+# the baseline a clause or question has to beat: what e5 considers "any contract text"
+GENERIC_PROTOTYPES = [
+    "This Agreement is entered into on the date first written above between the parties named herein.",
+    "The parties have read and understood this Agreement and have signed it in the presence of witnesses.",
+    "Each party shall perform its obligations under this Agreement in good faith.",
+]
+GENERIC_QUESTIONS = [
+    "What is this document about?",
+    "Who are the parties to this agreement?",
+    "What are the obligations of each party?",
+    "Summarize this contract.",
+]
+
+_PHRASES = {
+    name: re.compile(r"\b(?:" + "|".join(re.escape(p) for p in sorted(spec["phrases"], key=len, reverse=True)) + r")", re.IGNORECASE)
+    for name, spec in CLAUSE_TYPES.items()
+}
+
+# sentence / sub-clause boundaries; ". " before a digit is kept ("Rs. 50,000")
+_SENTENCE_END = re.compile(r"(?<=[.;:])\s+(?=[A-Z(\"'])|\n+")
+
+_vectors = None
+_vectors_lock = threading.Lock()
+
+
+def _prototype_vectors() -> dict:
+    """
+    Prototype matrices with a row -> type index for clauses and questions,
+    plus the generic baselines; embedded once per process with the document
+    embedder.
+    """
+    global _vectors
+    if _vectors is None:
+        with _vectors_lock:
+            if _vectors is None:
+                from utils import embed_chunks
+
+                types = list(CLAUSE_TYPES)
+                _vectors = {
+                    "types": types,
+                    "clauses": embed_chunks([p for t in types for p in CLAUSE_TYPES[t]["prototypes"]]),
+                    "clause_owner": np.asarray([i for i, t in enumerate(types) for _ in CLAUSE_TYPES[t]["prototypes"]]),
+                    "questions": embed_chunks([q for t in types for q in CLAUSE_TYPES[t]["questions"]]),
+                    "question_owner": np.asarray([i for i, t in enumerate(types) for _ in CLAUSE_TYPES[t]["questions"]]),
+                    "generic_clauses": embed_chunks(GENERIC_PROTOTYPES),
+                    "generic_questions": embed_chunks(GENERIC_QUESTIONS),
+                }
+    return _vectors
+
+
+def _best_per_type(sims: np.ndarray, owner: np.ndarray, n_types: int) -> np.ndarray:
+    # sims: (rows, prototypes) -> (rows, types), max over each type's prototypes
+    out = np.full((sims.shape[0], n_types), -1.0, dtype="float32")
+    for t in range(n_types):
+        out[:, t] = sims[:, owner == t].max(axis=1)
+    return out
+
+
+def warm_up():
+    """Embed the prototypes now, so the first request does not pay for it."""
+    _prototype_vectors()
+
+
+def _best_sentence(text: str, pattern) -> tuple:
+    # (start, end) within text of the sentence with the most phrase matches
+    best, best_hits, start = (0, len(text)), 0, 0
+    for boundary in list(_SENTENCE_END.finditer(text)) + [None]:
+        end = boundary.start() if boundary else len(text)
+        hits = len(pattern.findall(text, start, end))
+        if hits > best_hits:
+            best, best_hits = (start, end), hits
+        if boundary:
+            start = boundary.end()
+    return best
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+def build_clause_map(chunks, embeddings: np.ndarray, offsets=None) -> dict:
+    """
+    {clause_type: [{"chunk", "text", "context", "score", "margin", "phrases",
+    "start", "end"}, ...]} best first, for the types found in the document.
+    "text" is the matched sentence, "context" the whole chunk; start/end are
+    the sentence's document offsets (-1 without offsets).
+    """
+    if not settings.CLAUSE_MAP_ENABLED or len(chunks) == 0:
+        return {}
+
+    vectors = _prototype_vectors()
+    types = vectors["types"]
+    scores = _best_per_type(embeddings @ vectors["clauses"].T, vectors["clause_owner"], len(types))
+    baseline = (embeddings @ vectors["generic_clauses"].T).max(axis=1)
+
+    clause_map = {}
+    for t, name in enumerate(types):
+        candidates = []
+        for i in np.argsort(-scores[:, t]):
+            if scores[i, t] < settings.CLAUSE_MAP_MIN_SIMILARITY:
+                break
+            margin = float(scores[i, t] - baseline[i])
+            if margin < settings.CLAUSE_MAP_MIN_MARGIN:
+                continue
+            chunk = chunks[i]
+            phrases = {m.group(0).lower() for m in _PHRASES[name].finditer(chunk)}
+            if not phrases:
+                continue
+            s, e = _best_sentence(chunk, _PHRASES[name])
+            base = int(offsets[i][0]) if offsets is not None else None
+            candidates.append({
+                "chunk": int(i),
+                "text": chunk[s:e].strip(),
+                "context": chunk,
+                "score": round(float(scores[i, t]), 4),
+                "margin": round(margin, 4),
+                "phrases": sorted(phrases),
+                "start": base + s if base is not None else -1,
+                "end": base + e if base is not None else -1,
+            })
+            if len(candidates) >= settings.CLAUSE_MAP_MAX_SPANS:
+                break
+        if candidates:
+            clause_map[name] = candidates
+    return clause_map
+
+
+# -----------------------------
+# Query time
+# -----------------------------
+def match_question(q_emb: np.ndarray):
+    """
+    (clause_type, similarity) of the closest standard question, or
+    (None, similarity) below QA_FAST_PATH_SIMILARITY or when a generic
+    question is about as close (QA_FAST_PATH_MIN_MARGIN).
+    """
+    vectors = _prototype_vectors()
+    q = np.asarray(q_emb).reshape(1, -1)
+    sims = _best_per_type(q @ vectors["questions"].T, vectors["question_owner"], len(vectors["types"]))[0]
+    best = int(np.argmax(sims))
+    similarity = float(sims[best])
+    margin = similarity - float((q @ vectors["generic_questions"].T).max())
+    if similarity < settings.QA_FAST_PATH_SIMILARITY or margin < settings.QA_FAST_PATH_MIN_MARGIN:
+        return None, similarity
+    return vectors["types"][best], similarity
@@ -1,5 +1,6 @@
  # config.py
 from pydantic_settings import BaseSettings
+from typing import List
 import os
 
 class Settings(BaseSettings):
@@ -12,12 +13,123 @@ class Settings(BaseSettings):
     OPENROUTER_API_KEY: str
     OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1/chat/completions"
     OPENROUTER_MODEL: str = "mistralai/mistral-7b-instruct:free"
+    OPENROUTER_FALLBACK_MODELS: List[str] = []
+
+    # generation backends, tried in order: "openrouter", "local", "stub"
+    GENERATION_BACKENDS: List[str] = ["openrouter"]
+    GENERATION_TIMEOUT_SECONDS: float = 60
+    GENERATION_HEDGE_AFTER_SECONDS: float = 5.0
+    GENERATION_MAX_HEDGES: int = 1
+    CIRCUIT_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_RESET_SECONDS: float = 30
+    CIRCUIT_HALF_OPEN_TIMEOUT_SECONDS: float = 90
+    LOCAL_LLM_BASE_URL: str = "http://localhost:8080/v1/chat/completions"
+    LOCAL_LLM_MODEL: str = "local"
+    LOCAL_LLM_API_KEY: str = ""
+    STUB_LLM_DELAY_SECONDS: float = 0.0
+
+    LOG_LEVEL: str = "INFO"
+
+    # embedding backend: "torch" (sentence-transformers), "onnx" (ONNX Runtime)
+    # or "remote" (shared model server, model_server.py)
+    EMBED_BACKEND: str = "torch"
+    EMBED_ONNX_DIR: str = "onnx_models/e5-large-v2"
+    EMBED_ONNX_QUANTIZE: bool = False
+    EMBED_ONNX_THREADS: int = 0
+
+    # summarizer: "local" (Pegasus loaded in each API worker) or "remote"
+    SUMMARIZER_BACKEND: str = "local"
+
+    # shared model server (python -m model_server)
+    MODEL_SERVER_SOCKET: str = "/tmp/legalease-models.sock"
+    MODEL_SERVER_AUTHKEY: str = ""  # defaults to SECRET_KEY
+    MODEL_SERVER_SHM_DIR: str = "/dev/shm"
+    MODEL_SERVER_EMBED_BACKEND: str = "torch"
+    MODEL_SERVER_MAX_BATCH: int = 256
+    MODEL_SERVER_BATCH_WAIT_MS: float = 5
+    MODEL_SERVER_ENCODE_BATCH_SIZE: int = 64
 
     UPLOAD_DIR: str = "uploads"
     INDEX_DIR: str = "indexes"
     CHUNKS_DIR: str = "chunks"
+    CHUNKER: str = "clause"  # "clause" (chunker.py) or "langchain"
+    MAX_UPLOAD_BYTES: int = 25 * 1024 * 1024
+    MULTIPART_OVERHEAD_BYTES: int = 64 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    # bulk ingestion (bulk_ingest.py, POST /documents/bulk)
+    BULK_MAX_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024
+    BULK_WINDOW_DOCS: int = 64
+    BULK_EMBED_BATCH_SIZE: int = 128
+    BULK_EXTRACT_WORKERS: int = 0  # 0 = CPU count
+    BULK_MAX_EXTRACTED_BYTES: int = 8 * 1024 * 1024 * 1024
+    BULK_JOB_HEARTBEAT_SECONDS: float = 30
+    BULK_JOB_STALE_SECONDS: float = 120
+
+    SIMPLIFY_MAX_PAGE_SENTENCES: int = 1000
+    SIMPLIFY_CACHE_DIR: str = "simplify_cache"
+    SIMPLIFY_CACHE_MAX_FILES: int = 256
+
+    # GET /documents/events: "local" (in-process events, single worker) or
+    # "mongo" (change streams, several workers; needs a replica set)
+    STATUS_EVENTS_SOURCE: str = "local"
+    STATUS_STREAM_KEEPALIVE_SECONDS: float = 15
+    STATUS_STREAM_QUEUE: int = 256
+
+    # summarization: rank chunks and only summarize the most central ones
+    SUMMARY_EXTRACTIVE: bool = True
+    SUMMARY_TOKEN_BUDGET: int = 3600
+
+    # artifacts precomputed after ingestion ("summary", "simplified"); [] disables
+    ARTIFACT_STAGES: List[str] = ["summary", "simplified"]
+    ARTIFACTS_DIR: str = "artifacts"
+    ARTIFACT_WORKER_NICE: int = 10
+    ARTIFACT_MAX_QUEUED_TEXTS: int = 8
+    ARTIFACT_LEASE_SECONDS: float = 300
+    ARTIFACT_RECOVER_INTERVAL_SECONDS: float = 60
+
+    # admission control (admission.py): per-class concurrency, queue depth, queue wait
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_TOTAL_SLOTS: int = 16
+    ADMISSION_INTERACTIVE_RESERVE: int = 4  # slots only Q&A may use
+    ADMISSION_QA_CONCURRENCY: int = 12
+    ADMISSION_QA_QUEUE: int = 64
+    ADMISSION_QA_MAX_WAIT_SECONDS: float = 10
+    ADMISSION_SUMMARIZE_CONCURRENCY: int = 2
+    ADMISSION_SUMMARIZE_QUEUE: int = 8
+    ADMISSION_SUMMARIZE_MAX_WAIT_SECONDS: float = 60
+    ADMISSION_INGEST_CONCURRENCY: int = 4
+    ADMISSION_INGEST_QUEUE: int = 32
+    ADMISSION_INGEST_MAX_WAIT_SECONDS: float = 30
+    # documents processed at once after /documents/upload (outside admission)
+    INGEST_BACKGROUND_CONCURRENCY: int = 4
+
     MAX_CHUNKS_FETCH: int = 10
 
+    # QA prompt packing
+    QA_FETCH_K: int = 20
+    QA_CONTEXT_TOKEN_BUDGET: int = 1200
+    QA_BATCH_MAX_QUESTIONS: int = 50
+    QA_BATCH_CONCURRENCY: int = 4
+
+    # semantic answer cache for /qa/ask
+    QA_CACHE_ENABLED: bool = True
+    QA_CACHE_SIMILARITY: float = 0.95
+    QA_CACHE_TTL_SECONDS: int = 3600
+    QA_CACHE_MAX_ENTRIES_PER_DOC: int = 256
+    QA_CACHE_MAX_DOCS: int = 1000
+
+    # clause map built at ingestion + extractive fast path in /qa/ask
+    # e5 cosines are compressed (unrelated contract text is often > 0.75), so the
+    # margin over generic boilerplate / generic questions is the main gate
+    CLAUSE_MAP_ENABLED: bool = True
+    CLAUSE_MAP_MIN_SIMILARITY: float = 0.86
+    CLAUSE_MAP_MIN_MARGIN: float = 0.03
+    CLAUSE_MAP_MAX_SPANS: int = 2
+    QA_FAST_PATH_ENABLED: bool = True
+    QA_FAST_PATH_SIMILARITY: float = 0.92
+    QA_FAST_PATH_MIN_MARGIN: float = 0.04
+
     class Config:
         env_file = ".env"
 
@@ -26,3 +138,5 @@ settings = Settings()
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(settings.INDEX_DIR, exist_ok=True)
 os.makedirs(settings.CHUNKS_DIR, exist_ok=True)
+os.makedirs(settings.ARTIFACTS_DIR, exist_ok=True)
+os.makedirs(settings.SIMPLIFY_CACHE_DIR, exist_ok=True)
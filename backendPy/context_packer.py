@@ -0,0 +1,91 @@
+# context_packer.py
+import re
+
+# ~1 token per short word / 4-char word piece / punctuation mark, which tracks
+# BPE tokenizers closely enough for budgeting without loading one.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def truncate_tokens(text: str, token_budget: int) -> str:
+    """
+    Longest prefix of text that ends on a token boundary and estimates to at
+    most token_budget tokens (at least one token).
+    """
+    end = 0
+    for i, m in enumerate(_TOKEN_RE.finditer(text)):
+        if i >= max(token_budget, 1):
+            break
+        end = m.end()
+    return text[:end]
+
+
+def merge_hits(hits: list) -> list:
+    """
+    Merge retrieved chunks that overlap or touch in the source document into
+    single spans, so shared chunk_overlap text is sent only once.
+
+    hits: dicts with "text", "score", "start", "end" (start/end = -1 when the
+    position is unknown). Returns spans with the same keys, score = best hit.
+    """
+    located = sorted((h for h in hits if h["start"] >= 0), key=lambda h: h["start"])
+    unlocated = [h for h in hits if h["start"] < 0]
+
+    spans = []
+    for h in located:
+        if spans and h["start"] <= spans[-1]["end"]:
+            cur = spans[-1]
+            if h["end"] > cur["end"]:
+                cur["text"] += h["text"][cur["end"] - h["start"]:]
+                cur["end"] = h["end"]
+            cur["score"] = max(cur["score"], h["score"])
+        else:
+            spans.append({"text": h["text"], "score": h["score"], "start": h["start"], "end": h["end"]})
+
+    seen = {s["text"] for s in spans}
+    for h in unlocated:
+        if h["text"] in seen:
+            continue
+        seen.add(h["text"])
+        spans.append({"text": h["text"], "score": h["score"], "start": -1, "end": -1})
+
+    return spans
+
+
+def pack_contexts(hits: list, token_budget: int):
+    """
+    Merge overlapping hits and fill token_budget with the highest scoring
+    spans. The best span is truncated rather than dropped if it alone exceeds
+    the budget.
+
+    Returns (spans, stats) with spans in score order.
+    """
+    spans = sorted(merge_hits(hits), key=lambda s: s["score"], reverse=True)
+
+    packed = []
+    used = 0
+    dropped = 0
+    for span in spans:
+        tokens = estimate_tokens(span["text"])
+        if used + tokens <= token_budget:
+            packed.append(span)
+            used += tokens
+        elif not packed:
+            span = {**span, "text": truncate_tokens(span["text"], token_budget)}
+            packed.append(span)
+            used += estimate_tokens(span["text"])
+        else:
+            dropped += 1
+
+    stats = {
+        "hits": len(hits),
+        "spans": len(spans),
+        "packed": len(packed),
+        "dropped": dropped,
+        "context_tokens": used,
+        "raw_tokens": sum(estimate_tokens(h["text"]) for h in hits),
+    }
+    return packed, stats
@@ -1,12 +1,14 @@
 # db.py
 from pymongo import MongoClient
 from config import settings
+from metrics import MongoMetricsListener
 
-client = MongoClient(settings.MONGODB_URI)
+client = MongoClient(settings.MONGODB_URI, event_listeners=[MongoMetricsListener()])
 db = client[settings.DB_NAME]
 
 users_col = db["users"]
 documents_col = db["documents"]
 chats_col = db["chats"]
+ingest_jobs_col = db["ingest_jobs"]
 
 users_col.create_index("email", unique=True)
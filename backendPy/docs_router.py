@@ -45,22 +45,33 @@
 
 # docs_router.py
 import os
-import shutil
-from datetime import datetime
+import json
+import socket
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Optional
 from bson.errors import InvalidId
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from bson import ObjectId
 
-from db import documents_col
+from db import documents_col, ingest_jobs_col
 from config import settings
 from auth import get_current_user
+from metrics import track_stage
+from uploads import save_upload, temp_upload_path, discard
+from bulk_ingest import ingest
+from artifacts import artifact_worker, pending_fields, simplified_path, enabled_artifacts, ARTIFACT_KINDS
+from clause_map import build_clause_map
+from status_events import status_bus, event_from_document, EVENT_FIELDS
 from utils import (
     extract_text_from_file,
-    chunk_text,
+    chunk_text_with_offsets,
     embed_chunks,
-    build_faiss_index,
-    save_index,
-    save_chunks,
+    store_document_index,
 )
 
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -69,7 +80,27 @@ router = APIRouter(prefix="/documents", tags=["documents"])
 # -----------------------------
 # Background processing logic
 # -----------------------------
-def process_document(document_id: str, file_path: str):
+def _enter_stage(document_id: str, user_id: str, stage: str, timings: dict):
+    # recorded on the document (status endpoint, change streams) and pushed to /documents/events
+    documents_col.update_one(
+        {"_id": ObjectId(document_id)},
+        {"$set": {"status": "PROCESSING", "stage": stage, "stage_durations": timings}}
+    )
+    status_bus.publish(user_id, document_id, status="PROCESSING", stage=stage, stage_durations=dict(timings))
+
+
+# background processing after /documents/upload; the admission slot is
+# released once the upload response is sent
+_processing = threading.BoundedSemaphore(settings.INGEST_BACKGROUND_CONCURRENCY)
+
+
+def process_document(document_id: str, file_path: str, user_id: str = None):
+    with _processing:
+        _process_document(document_id, file_path, user_id)
+
+
+def _process_document(document_id: str, file_path: str, user_id: str = None):
+    timings = {}
     try:
         # mark as PROCESSING
         documents_col.update_one(
@@ -78,28 +109,48 @@ def process_document(document_id: str, file_path: str):
         )
 
         # 1. extract text
-        text = extract_text_from_file(file_path)
+        _enter_stage(document_id, user_id, "extraction", timings)
+        with track_stage("extraction", timings):
+            text = extract_text_from_file(file_path)
 
         # 2. chunk
-        chunks = chunk_text(text)
+        _enter_stage(document_id, user_id, "chunking", timings)
+        with track_stage("chunking", timings):
+            chunks, offsets = chunk_text_with_offsets(text)
 
         # 3. embed
-        embeddings = embed_chunks(chunks)
+        _enter_stage(document_id, user_id, "embedding", timings)
+        with track_stage("embedding", timings):
+            embeddings = embed_chunks(chunks)
 
         # 4. build + save FAISS index
-        index = build_faiss_index(embeddings)
-        save_index(index, document_id)
-        save_chunks(document_id, chunks)
+        _enter_stage(document_id, user_id, "indexing", timings)
+        with track_stage("indexing", timings):
+            store_document_index(document_id, chunks, offsets, embeddings)
+
+        # 5. clause map for the /qa/ask fast path (reuses the chunk embeddings)
+        with track_stage("clause_map", timings):
+            clause_map = build_clause_map(chunks, embeddings, offsets)
 
-        # mark as READY
+        # mark as READY (+ queue summary / simplification on the artifact worker)
         documents_col.update_one(
             {"_id": ObjectId(document_id)},
             {"$set": {
                 "status": "READY",
+                "stage": "done",
                 "chunks_count": len(chunks),
-                "updated_at": datetime.utcnow()
+                "stage_durations": timings,
+                "clause_map": clause_map,
+                "updated_at": datetime.utcnow(),
+                **pending_fields(),
             }}
         )
+        status_bus.publish(
+            user_id, document_id,
+            status="READY", stage="done", chunks_count=len(chunks), stage_durations=timings,
+            artifacts={k: "PENDING" for k in enabled_artifacts()},
+        )
+        artifact_worker.submit(document_id, file_path, text)
 
     except Exception as e:
         documents_col.update_one(
@@ -107,16 +158,18 @@ def process_document(document_id: str, file_path: str):
             {"$set": {
                 "status": "FAILED",
                 "error": str(e),
+                "stage_durations": timings,
                 "updated_at": datetime.utcnow()
             }}
         )
+        status_bus.publish(user_id, document_id, status="FAILED", error=str(e), stage_durations=timings)
 
 
 # -----------------------------
 # Upload document
 # -----------------------------
 @router.post("/upload")
-def upload_document(
+async def upload_document(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user: dict = Depends(get_current_user),
@@ -125,32 +178,40 @@ def upload_document(
     if ext not in (".pdf", ".txt", ".docx"):
         raise HTTPException(status_code=400, detail="Unsupported file type")
 
-    # create db record immediately
+    # stream to disk first (size limit + content hash), then create the db record
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    incoming_path = temp_upload_path(ext)
+    saved = await save_upload(file, incoming_path)
+
     doc = {
         "filename": file.filename,
         "user_id": user["id"], 
         "status": "PROCESSING",
+        "size_bytes": saved["size_bytes"],
+        "sha256": saved["sha256"],
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
 
-    res = documents_col.insert_one(doc)
+    try:
+        res = await run_in_threadpool(documents_col.insert_one, doc)
+    except Exception:
+        discard(incoming_path)
+        raise
     document_id = str(res.inserted_id)
 
-    # save file
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     dest_path = os.path.join(settings.UPLOAD_DIR, f"{document_id}{ext}")
+    os.replace(incoming_path, dest_path)
 
-    with open(dest_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-
-    documents_col.update_one(
+    await run_in_threadpool(
+        documents_col.update_one,
         {"_id": res.inserted_id},
         {"$set": {"file_path": dest_path}}
     )
 
     # background task
-    background_tasks.add_task(process_document, document_id, dest_path)
+    status_bus.publish(user["id"], document_id, status="PROCESSING")
+    background_tasks.add_task(process_document, document_id, dest_path, user["id"])
 
     return {
         "document_id": document_id,
@@ -160,13 +221,141 @@ def upload_document(
 
 
 # -----------------------------
-# Poll document status
+# Bulk ingestion (zip archive)
 # -----------------------------
-@router.get("/status/{document_id}")
-def get_document_status(
-    document_id: str,
+def _job_heartbeat(job_id: ObjectId, stop: threading.Event):
+    # lets resume tell a running job from one whose process died
+    while not stop.wait(settings.BULK_JOB_HEARTBEAT_SECONDS):
+        ingest_jobs_col.update_one({"_id": job_id}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+
+
+def run_bulk_job(job_id: str):
+    job = ingest_jobs_col.find_one({"_id": ObjectId(job_id)})
+    ingest_jobs_col.update_one(
+        {"_id": job["_id"]},
+        {"$set": {
+            "status": "RUNNING",
+            "owner": f"{socket.gethostname()}:{os.getpid()}",
+            "heartbeat_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }}
+    )
+    stop = threading.Event()
+    threading.Thread(target=_job_heartbeat, args=(job["_id"], stop), name=f"bulk-heartbeat-{job_id}", daemon=True).start()
+
+    def progress(report: dict):
+        ingest_jobs_col.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"progress": report, "updated_at": datetime.utcnow()}}
+        )
+
+    try:
+        report = ingest(job["archive_path"], job["user_id"], checkpoint_path=job["checkpoint_path"], progress=progress)
+        ingest_jobs_col.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "COMPLETED", "progress": report, "updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        ingest_jobs_col.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "FAILED", "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+    finally:
+        stop.set()
+
+
+def _get_bulk_job(job_id: str, user: dict):
+    try:
+        obj_id = ObjectId(job_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+
+    job = ingest_jobs_col.find_one({"_id": obj_id, "user_id": user["id"]})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/bulk")
+async def bulk_upload(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
     user: dict = Depends(get_current_user),
 ):
+    if not file.filename.lower().endswith(".zip"):
+        raise HTTPException(status_code=400, detail="Bulk upload expects a .zip archive")
+
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    incoming_path = temp_upload_path(".zip")
+    saved = await save_upload(file, incoming_path, max_bytes=settings.BULK_MAX_UPLOAD_BYTES)
+
+    res = await run_in_threadpool(ingest_jobs_col.insert_one, {
+        "user_id": user["id"],
+        "filename": file.filename,
+        "status": "QUEUED",
+        "size_bytes": saved["size_bytes"],
+        "sha256": saved["sha256"],
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+    })
+    job_id = str(res.inserted_id)
+
+    archive_path = os.path.join(settings.UPLOAD_DIR, f"bulk-{job_id}.zip")
+    os.replace(incoming_path, archive_path)
+    await run_in_threadpool(
+        ingest_jobs_col.update_one,
+        {"_id": res.inserted_id},
+        {"$set": {"archive_path": archive_path, "checkpoint_path": archive_path + ".ckpt.json"}}
+    )
+
+    background_tasks.add_task(run_bulk_job, job_id)
+
+    return {"job_id": job_id, "filename": file.filename, "status": "QUEUED"}
+
+
+@router.get("/bulk/{job_id}")
+def get_bulk_job(job_id: str, user: dict = Depends(get_current_user)):
+    job = _get_bulk_job(job_id, user)
+    return {
+        "job_id": job_id,
+        "filename": job["filename"],
+        "status": job["status"],
+        "progress": job.get("progress", {}),
+        "error": job.get("error"),
+    }
+
+
+@router.post("/bulk/{job_id}/resume")
+def resume_bulk_job(job_id: str, background_tasks: BackgroundTasks, user: dict = Depends(get_current_user)):
+    """
+    Requeue a job that failed, or one left QUEUED / RUNNING by a process that
+    died (no heartbeat for BULK_JOB_STALE_SECONDS). Done sources are skipped
+    and retried ones keep their document ids (see bulk_ingest).
+    """
+    job = _get_bulk_job(job_id, user)
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.BULK_JOB_STALE_SECONDS)
+
+    # one atomic transition, so two resume calls cannot both start the job
+    claimed = ingest_jobs_col.update_one(
+        {"_id": job["_id"], "$or": [
+            {"status": {"$nin": ["QUEUED", "RUNNING"]}},
+            {"heartbeat_at": {"$exists": False}},
+            {"heartbeat_at": {"$lt": stale}},
+        ]},
+        {"$set": {"status": "QUEUED", "heartbeat_at": now, "updated_at": now}, "$unset": {"owner": "", "error": ""}}
+    )
+    if not claimed.modified_count:
+        raise HTTPException(status_code=409, detail="Job is already running")
+
+    background_tasks.add_task(run_bulk_job, job_id)
+    return {"job_id": job_id, "status": "QUEUED"}
+
+
+# -----------------------------
+# Poll document status
+# -----------------------------
+def _get_user_document(document_id: str, user: dict, projection: dict = None):
     try:
         obj_id = ObjectId(document_id)
     except InvalidId:
@@ -176,23 +365,168 @@ def get_document_status(
         {
             "_id": obj_id,
             "user_id": user["id"],   # security check
-        }
+        },
+        projection
     )
 
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
+    return doc
+
+
+# status polling reads only these, not clause_map (chunk contexts) or artifact bodies
+STATUS_PROJECTION = {
+    "status": 1, "stage": 1, "chunks_count": 1, "stage_durations": 1,
+    **{f"artifacts.{kind}.status": 1 for kind in ARTIFACT_KINDS},
+}
+
+
+@router.get("/status/{document_id}")
+def get_document_status(
+    document_id: str,
+    user: dict = Depends(get_current_user),
+):
+    doc = _get_user_document(document_id, user, STATUS_PROJECTION)
 
     return {
         "document_id": document_id,
         "status": doc["status"],
+        "stage": doc.get("stage"),
         "chunks_count": doc.get("chunks_count", 0),
+        "stage_durations": doc.get("stage_durations", {}),
+        "artifacts": {k: a["status"] for k, a in doc.get("artifacts", {}).items()},
+    }
+
+
+# -----------------------------
+# Push status (Server-Sent Events)
+# -----------------------------
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/events")
+async def document_events(
+    request: Request,
+    document_id: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Server-Sent Events stream of the user's document status, replacing
+    polling of /status/{document_id}. Starts with one "snapshot" event (all
+    of the user's documents, or just document_id), then a "status" event per
+    change: status, pipeline stage, chunks_count, stage_durations, error and
+    artifact states, as they happen.
+    """
+    query = {"user_id": user["id"]}
+    if document_id:
+        try:
+            query["_id"] = ObjectId(document_id)
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid document ID")
+
+    async def stream():
+        # subscribe before the snapshot so no change falls in between
+        queue = status_bus.subscribe(user["id"])
+        try:
+            docs = await run_in_threadpool(
+                lambda: list(documents_col.find(query, {f: 1 for f in EVENT_FIELDS}))
+            )
+            yield _sse("snapshot", [event_from_document(d) for d in docs])
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.STATUS_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if document_id and event["document_id"] != document_id:
+                    continue
+                yield _sse("status", event)
+        finally:
+            status_bus.unsubscribe(user["id"], queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -----------------------------
+# Precomputed artifacts
+# -----------------------------
+def _ready_artifact(document_id: str, doc: dict, kind: str):
+    """
+    The artifact record if READY; otherwise raises 404 (never scheduled) or
+    returns a 202 (queued / running) or 500 (failed) response to pass through.
+    """
+    artifact = doc.get("artifacts", {}).get(kind)
+    if not artifact:
+        raise HTTPException(status_code=404, detail=f"No {kind} for this document")
+
+    status = artifact["status"]
+    if status == "READY":
+        return artifact, None
+
+    body = {"document_id": document_id, "status": status}
+    if status == "FAILED":
+        return None, JSONResponse(status_code=500, content={**body, "error": artifact.get("error")})
+    return None, JSONResponse(status_code=202, content=body)
+
+
+@router.get("/{document_id}/summary")
+def get_document_summary(document_id: str, user: dict = Depends(get_current_user)):
+    doc = _get_user_document(document_id, user, {"filename": 1, "artifacts.summary": 1})
+    artifact, response = _ready_artifact(document_id, doc, "summary")
+    if response:
+        return response
+
+    return {
+        "document_id": document_id,
+        "filename": doc["filename"],
+        "summary": artifact["text"],
+    }
+
+
+@router.get("/{document_id}/simplified")
+def get_document_simplified(
+    document_id: str,
+    offset: int = 0,
+    limit: int = 200,
+    user: dict = Depends(get_current_user),
+):
+    if offset < 0 or not 1 <= limit <= settings.SIMPLIFY_MAX_PAGE_SENTENCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset must be >= 0 and limit between 1 and {settings.SIMPLIFY_MAX_PAGE_SENTENCES}"
+        )
+
+    doc = _get_user_document(document_id, user, {"filename": 1, "artifacts.simplified": 1})
+    artifact, response = _ready_artifact(document_id, doc, "simplified")
+    if response:
+        return response
+
+    with open(simplified_path(document_id), "r", encoding="utf-8") as f:
+        sentences = [line.rstrip("\n") for line in islice(f, offset, offset + limit)]
+
+    total = artifact["sentences"]
+    return {
+        "document_id": document_id,
+        "filename": doc["filename"],
+        "offset": offset,
+        "total": total,
+        "sentences": sentences,
+        "next_offset": offset + limit if offset + limit < total else None,
     }
 
 @router.get("/list")
 def list_documents(user: dict = Depends(get_current_user)):
     docs = documents_col.find(
         {"user_id": user["id"]},
-        {"file_path": 0}
+        {"filename": 1, "status": 1}
     )
 
     return [
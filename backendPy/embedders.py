@@ -0,0 +1,26 @@
+# embedders.py
+# Embedding model loading, kept apart from utils (which builds the process-wide
+# embedder at import) so the model server can load exactly one backend.
+from config import settings
+
+EMBED_MODEL = "intfloat/e5-large-v2"
+
+
+def load_embedder(backend: str = None):
+    backend = backend or settings.EMBED_BACKEND
+    if backend == "onnx":
+        from onnx_embedder import OnnxEmbedder
+        return OnnxEmbedder.from_pretrained(
+            EMBED_MODEL,
+            settings.EMBED_ONNX_DIR,
+            quantize=settings.EMBED_ONNX_QUANTIZE,
+            threads=settings.EMBED_ONNX_THREADS,
+        )
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBED_MODEL)
+    if backend == "remote":
+        # shared model server (model_server.py); connects on first use
+        from model_client import model_client
+        return model_client
+    raise ValueError(f"Unknown embedding backend: {backend}")
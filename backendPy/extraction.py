@@ -0,0 +1,80 @@
+# extraction.py
+# File -> text -> chunks. Kept free of model imports so it is cheap to load in
+# worker processes (see bulk_ingest).
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+import pdfplumber
+from docx import Document
+
+from config import settings
+from chunker import chunk_offsets, ChunkView
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+
+# langchain chunker (CHUNKER="langchain")
+splitter = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+    separators=["\n\n","\n","Clause ","Section ","Article ","Paragraph ","."," "], keep_separator=True
+)
+
+ALLOWED = (".pdf", ".txt", ".docx")
+
+def extract_text_from_file(file_path: str):
+    text = ""
+    if file_path.lower().endswith(".pdf"):
+        with pdfplumber.open(file_path) as pdf:
+            for p in pdf.pages:
+                t = p.extract_text()
+                if t:
+                    text += t + "\n"
+    elif file_path.lower().endswith(".txt"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            text = f.read()
+    elif file_path.lower().endswith(".docx"):
+        doc = Document(file_path)
+        text = "\n".join([p.text for p in doc.paragraphs])
+    else:
+        raise ValueError("Unsupported file type")
+    return text.strip()
+
+def chunk_text(text: str):
+    return list(chunk_text_with_offsets(text)[0])
+
+def chunk_text_with_offsets(text: str):
+    """
+    Chunks of text plus the (start, end) character offset of each chunk.
+
+    CHUNKER="clause" (default) uses the single-pass clause chunker and returns
+    a ChunkView that slices text lazily. CHUNKER="langchain" uses the
+    recursive splitter and locates each chunk afterwards; chunks that cannot
+    be located get (-1, -1).
+    """
+    if settings.CHUNKER == "clause":
+        offsets = chunk_offsets(text, CHUNK_SIZE, CHUNK_OVERLAP)
+        return ChunkView(text, offsets), offsets
+    return split_with_langchain(text)
+
+def split_with_langchain(text: str):
+    chunks = splitter.split_text(text)
+    offsets = []
+    cursor = 0
+    for c in chunks:
+        start = text.find(c, cursor)
+        if start == -1:
+            offsets.append((-1, -1))
+            continue
+        offsets.append((start, start + len(c)))
+        cursor = start + 1
+    return chunks, offsets
+
+def extract_and_chunk(file_path: str):
+    """
+    Process-pool entry point for bulk ingestion.
+    Returns (chunks, offsets, chars, seconds).
+    """
+    start = time.perf_counter()
+    text = extract_text_from_file(file_path)
+    chunks, offsets = chunk_text_with_offsets(text)
+    return chunks, offsets, len(text), round(time.perf_counter() - start, 4)
@@ -0,0 +1,402 @@
+# generation.py
+import json
+import time
+import threading
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from config import settings
+from metrics import track_stage
+
+
+class GenerationError(Exception):
+    pass
+
+
+# -----------------------------
+# Per-backend health tracking
+# -----------------------------
+class LatencyTracker:
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        idx = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[idx]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": len(self._samples),
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN after failure_threshold consecutive failures.
+    OPEN -> HALF_OPEN after reset_seconds, when one trial request is sent.
+    HALF_OPEN -> CLOSED on success, back to OPEN on failure, or back to OPEN
+    when the trial has not reported within half_open_timeout (e.g. a stream
+    the client cancelled), so the next request can try again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float, half_open_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_timeout = half_open_timeout
+        self.state = "CLOSED"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def _expire_trial(self, now: float):
+        if self.state == "HALF_OPEN" and now - self.trial_started >= self.half_open_timeout:
+            self.state = "OPEN"
+            self.opened_at = now - self.reset_seconds  # eligible for a new trial right away
+
+    def available(self) -> bool:
+        """
+        Whether acquire() would succeed; changes nothing. Use to pick
+        candidates that may never be sent a request.
+        """
+        with self._lock:
+            now = time.time()
+            self._expire_trial(now)
+            return self.state == "CLOSED" or (self.state == "OPEN" and now - self.opened_at >= self.reset_seconds)
+
+    def acquire(self) -> bool:
+        """
+        Call right before sending a request. Takes the half-open trial slot
+        when the cooldown is over; False while OPEN or while a trial is out.
+        """
+        with self._lock:
+            now = time.time()
+            self._expire_trial(now)
+            if self.state == "CLOSED":
+                return True
+            if self.state == "OPEN" and now - self.opened_at >= self.reset_seconds:
+                self.state = "HALF_OPEN"
+                self.trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "CLOSED"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "HALF_OPEN" or self.failures >= self.failure_threshold:
+                self.state = "OPEN"
+                self.opened_at = time.time()
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+class GenerationBackend:
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS, settings.CIRCUIT_HALF_OPEN_TIMEOUT_SECONDS
+        )
+        self.latency = LatencyTracker()
+
+    def _generate(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        raise NotImplementedError
+
+    def generate(self, prompt: str, max_tokens=300, temperature=0.1, cancel: threading.Event = None) -> str:
+        """
+        With cancel, the answer is read as a stream and abandoned (upstream
+        response closed) at the next piece after cancel is set; the result is
+        then None and neither the breaker nor the latency is updated.
+        """
+        start = time.time()
+        try:
+            with track_stage("llm_call"):
+                if cancel is None:
+                    text = self._generate(prompt, max_tokens, temperature)
+                else:
+                    text = self._generate_cancellable(prompt, max_tokens, temperature, cancel)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if text is None:
+            return None
+        self.latency.record(time.time() - start)
+        self.breaker.record_success()
+        return text
+
+    def _stream(self, prompt: str, max_tokens: int, temperature: float):
+        # backends without native streaming send the whole answer as one piece
+        yield self._generate(prompt, max_tokens, temperature)
+
+    def _generate_cancellable(self, prompt: str, max_tokens: int, temperature: float, cancel: threading.Event):
+        pieces = self._stream(prompt, max_tokens, temperature)
+        parts = []
+        try:
+            for piece in pieces:
+                if cancel.is_set():
+                    return None
+                parts.append(piece)
+        finally:
+            pieces.close()
+        return "".join(parts).strip()
+
+    def stream(self, prompt: str, max_tokens=300, temperature=0.1):
+        """
+        Yields answer text as it is produced. Closing the generator early
+        closes the upstream response, which stops generation there.
+        """
+        start = time.time()
+        try:
+            with track_stage("llm_stream"):
+                yield from self._stream(prompt, max_tokens, temperature)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.latency.record(time.time() - start)
+        self.breaker.record_success()
+
+    def stats(self) -> dict:
+        return {"name": self.name, "circuit": self.breaker.state, "latency": self.latency.snapshot()}
+
+
+class ChatCompletionsBackend(GenerationBackend):
+    """
+    Any OpenAI-compatible /chat/completions endpoint (OpenRouter, vLLM,
+    llama.cpp server, Ollama, ...).
+    """
+
+    def __init__(self, name: str, url: str, model: str, api_key: str = "", timeout: float = 60):
+        super().__init__(name)
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def _request(self, prompt, max_tokens, temperature, stream=False):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a legal assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if stream:
+            payload["stream"] = True
+        resp = requests.post(self.url, headers=headers, json=payload, timeout=self.timeout, stream=stream)
+        resp.raise_for_status()
+        return resp
+
+    def _generate(self, prompt, max_tokens, temperature):
+        data = self._request(prompt, max_tokens, temperature).json()
+        return data["choices"][0]["message"]["content"].strip()
+
+    def _stream(self, prompt, max_tokens, temperature):
+        # SSE lines: "data: {chunk}" ... "data: [DONE]"
+        with self._request(prompt, max_tokens, temperature, stream=True) as resp:
+            if not resp.headers.get("Content-Type", "").startswith("text/event-stream"):
+                # server ignored "stream": answer arrives as one completion
+                yield resp.json()["choices"][0]["message"]["content"].strip()
+                return
+            # chunk_size=None: hand over data as it arrives, not per 512 bytes
+            for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise GenerationError(str(chunk["error"]))
+                for choice in chunk.get("choices", []):
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+
+
+class StubBackend(GenerationBackend):
+    """
+    Deterministic, offline backend for tests and benchmarks.
+    """
+
+    def __init__(self, name: str = "stub", delay: float = 0.0):
+        super().__init__(name)
+        self.delay = delay
+
+    def _generate(self, prompt, max_tokens, temperature):
+        if self.delay:
+            time.sleep(self.delay)
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"[stub:{digest}] The document does not specify this."
+
+    def _stream(self, prompt, max_tokens, temperature):
+        words = self._generate(prompt, max_tokens, temperature).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
+
+def _relay(first: str, pieces):
+    # unlike itertools.chain, closing this closes the backend stream too
+    try:
+        yield first
+        yield from pieces
+    finally:
+        pieces.close()
+
+
+# -----------------------------
+# Router: hedging + failover
+# -----------------------------
+class GenerationRouter:
+    def __init__(self, backends: list, hedge_after: float, max_hedges: int):
+        if not backends:
+            raise ValueError("At least one generation backend is required")
+        self.backends = backends
+        self.hedge_after = hedge_after
+        self.max_hedges = max_hedges
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 4 * len(backends)), thread_name_prefix="generation")
+
+    def generate(self, prompt: str, max_tokens=300, temperature=0.1):
+        """
+        Returns (text, backend_name). The first healthy backend is tried; if
+        it has not answered after hedge_after seconds the next healthy one is
+        started as well and the first result wins. Failed backends fall over
+        to the next one. Once there is a winner the others are cancelled:
+        queued ones never start, running ones stop at their next piece.
+        """
+        candidates = [b for b in self.backends if b.breaker.available()]
+
+        cancel = threading.Event()
+        futures = {}
+        next_candidate = 0
+        errors = []
+
+        def launch() -> bool:
+            # the breaker is only acquired for a backend that is really sent the request
+            nonlocal next_candidate
+            while next_candidate < len(candidates):
+                backend = candidates[next_candidate]
+                next_candidate += 1
+                if backend.breaker.acquire():
+                    futures[self._executor.submit(backend.generate, prompt, max_tokens, temperature, cancel)] = backend
+                    return True
+            return False
+
+        if not launch():
+            raise GenerationError("All generation backends are unavailable (circuit open)")
+        launched = 1
+        try:
+            while futures:
+                can_hedge = next_candidate < len(candidates) and launched <= self.max_hedges
+                done, _ = wait(futures, timeout=self.hedge_after if can_hedge else None, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    if launch():
+                        launched += 1
+                    continue
+
+                for f in done:
+                    backend = futures.pop(f)
+                    try:
+                        return f.result(), backend.name
+                    except Exception as e:
+                        errors.append(f"{backend.name}: {e}")
+
+                if not futures and launch():
+                    launched += 1
+        finally:
+            cancel.set()
+            for f in futures:
+                f.cancel()
+
+        raise GenerationError("; ".join(errors))
+
+    def stream(self, prompt: str, max_tokens=300, temperature=0.1):
+        """
+        Returns (backend_name, iterator of answer text). Backends are tried in
+        order until one produces its first piece; there is no hedging, since
+        two live streams would both be billed. Failures after the first piece
+        are raised from the iterator.
+        """
+        errors = []
+        for backend in self.backends:
+            # take the breaker (and a half-open trial) only for the backend tried
+            if not backend.breaker.acquire():
+                continue
+            pieces = backend.stream(prompt, max_tokens, temperature)
+            try:
+                first = next(pieces, "")
+            except Exception as e:
+                errors.append(f"{backend.name}: {e}")
+                continue
+            return backend.name, _relay(first, pieces)
+
+        raise GenerationError("; ".join(errors) or "All generation backends are unavailable (circuit open)")
+
+    def stats(self) -> list:
+        return [b.stats() for b in self.backends]
+
+
+def build_backends() -> list:
+    backends = []
+    for name in settings.GENERATION_BACKENDS:
+        if name == "openrouter":
+            for model in [settings.OPENROUTER_MODEL, *settings.OPENROUTER_FALLBACK_MODELS]:
+                backends.append(ChatCompletionsBackend(
+                    f"openrouter:{model}",
+                    settings.OPENROUTER_BASE_URL,
+                    model,
+                    api_key=settings.OPENROUTER_API_KEY,
+                    timeout=settings.GENERATION_TIMEOUT_SECONDS,
+                ))
+        elif name == "local":
+            backends.append(ChatCompletionsBackend(
+                f"local:{settings.LOCAL_LLM_MODEL}",
+                settings.LOCAL_LLM_BASE_URL,
+                settings.LOCAL_LLM_MODEL,
+                api_key=settings.LOCAL_LLM_API_KEY,
+                timeout=settings.GENERATION_TIMEOUT_SECONDS,
+            ))
+        elif name == "stub":
+            backends.append(StubBackend(delay=settings.STUB_LLM_DELAY_SECONDS))
+        else:
+            raise ValueError(f"Unknown generation backend: {name}")
+    return backends
+
+
+generation_router = GenerationRouter(
+    build_backends(),
+    hedge_after=settings.GENERATION_HEDGE_AFTER_SECONDS,
+    max_hedges=settings.GENERATION_MAX_HEDGES,
+)
+
+
+def generate(prompt: str, max_tokens=300, temperature=0.1):
+    return generation_router.generate(prompt, max_tokens=max_tokens, temperature=temperature)
+
+
+def generate_stream(prompt: str, max_tokens=300, temperature=0.1):
+    return generation_router.stream(prompt, max_tokens=max_tokens, temperature=temperature)
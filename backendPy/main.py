@@ -1,21 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+import os
+import re
+import uuid
+import logging
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from itertools import islice
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 from contextlib import asynccontextmanager
 
 from auth import router as auth_router
 from docs_router import router as docs_router
 from qa_router import router as qa_router
+from utils import embed_chunks
 from config import settings
-
-# Summarization
-from summarize.model import summarize_text, load_summarizer
-from summarize.pdf_utils import extract_text_from_pdf
-from summarize.doc_utils import extract_text_from_docx
-from summarize.text_utils import extract_text_from_txt
+from metrics import track_stage, render_latest
+from uploads import save_upload, temp_upload_path, discard, UploadSizeLimitMiddleware
+from artifacts import artifact_worker
+from model_client import model_client
+from admission import AdmissionMiddleware
+from status_events import status_bus
+import clause_map
+
+# Summarization (the Pegasus module is imported only when the model runs in-process)
+from summarize.pdf_utils import extract_text_from_pdf, iter_text_from_pdf
+from summarize.doc_utils import extract_text_from_docx, iter_text_from_docx
+from summarize.text_utils import extract_text_from_txt, iter_text_from_txt
 
 # Simplification
-from simplification.model import simplify_text
+from simplification.model import simplify_text, iter_simplified
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------
@@ -23,21 +44,49 @@ from simplification.model import simplify_text
 # ---------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Loading Legal Pegasus once on startup...")
-    
-    tokenizer, model = load_summarizer()
+    if settings.SUMMARIZER_BACKEND == "remote":
+        logger.info("Using the shared model server for summarization")
+    else:
+        from summarize.model import load_summarizer
+        logger.info("Loading Legal Pegasus once on startup...")
+
+        tokenizer, model = load_summarizer()
+
+        app.state.tokenizer = tokenizer
+        app.state.summarizer_model = model
 
-    app.state.tokenizer = tokenizer
-    app.state.summarizer_model = model
+    # precomputed summaries / simplifications for ingested documents
+    artifact_worker.start(summarize_document)
+
+    # clause prototype vectors for ingestion and the /qa/ask fast path
+    if settings.CLAUSE_MAP_ENABLED or settings.QA_FAST_PATH_ENABLED:
+        clause_map.warm_up()
+
+    if settings.STATUS_EVENTS_SOURCE == "mongo":
+        status_bus.start_mongo_watcher()
 
     yield
 
-    print("Shutting down Legal Pegasus...")
+    artifact_worker.stop()
+    logger.info("Shutting down Legal Pegasus...")
 
 
 app = FastAPI(title="Legal RAG API", lifespan=lifespan)
 
 
+# ---------------------------
+# ADMISSION CONTROL (added before CORS so 503s still carry CORS headers)
+# ---------------------------
+app.add_middleware(AdmissionMiddleware)
+
+
+# ---------------------------
+# UPLOAD SIZE LIMIT (outside admission so oversized uploads never wait for a slot,
+# under CORS so the 413 carries CORS headers)
+# ---------------------------
+app.add_middleware(UploadSizeLimitMiddleware)
+
+
 # ---------------------------
 # CORS
 # ---------------------------
@@ -47,6 +96,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
@@ -63,52 +113,100 @@ def root():
     return {"status": "ok", "service": "Legal RAG API"}
 
 
-# ---------------------------
-# SUMMARIZE ENDPOINT
-# ---------------------------
-@app.post("/summarize")
-async def summarize_file(
-    file: UploadFile = File(...),
-    max_length: int = Form(150),
-    min_length: int = Form(50)
-):
-    filename = file.filename.lower()
-    file_bytes = await file.read()
-
-    # Detect file type
-    if filename.endswith(".pdf"):
-        text = extract_text_from_pdf(file_bytes)
-
-    elif filename.endswith(".docx"):
-        text = extract_text_from_docx(file_bytes)
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
-    elif filename.endswith(".txt"):
-        text = extract_text_from_txt(file_bytes)
 
-    else:
+# ---------------------------
+# FILE → TEXT
+# ---------------------------
+EXTRACTORS = {
+    ".pdf": extract_text_from_pdf,
+    ".docx": extract_text_from_docx,
+    ".txt": extract_text_from_txt,
+}
+
+# page / paragraph / block generators for streaming consumers
+ITER_EXTRACTORS = {
+    ".pdf": iter_text_from_pdf,
+    ".docx": iter_text_from_docx,
+    ".txt": iter_text_from_txt,
+}
+
+
+def upload_ext(file: UploadFile) -> str:
+    ext = os.path.splitext(file.filename.lower())[1]
+    if ext not in EXTRACTORS:
         raise HTTPException(
             status_code=400,
             detail="Only PDF, DOCX, and TXT files are supported"
         )
+    return ext
+
+
+async def extract_upload_text(file: UploadFile) -> str:
+    """
+    Stream the upload to a temporary file and extract from the path, so the
+    file is never held in memory as one bytes object.
+    """
+    ext = upload_ext(file)
+    extractor = EXTRACTORS[ext]
+
+    path = temp_upload_path(ext)
+    try:
+        await save_upload(file, path)
+        with track_stage("extraction"):
+            text = await run_in_threadpool(extractor, path)
+    finally:
+        discard(path)
 
     if not text or not text.strip():
         raise HTTPException(status_code=400, detail="No text found in file")
+    return text
 
-    # Debug preview
-    print("\n========== EXTRACTED TEXT PREVIEW ==========")
-    print(text[:1000])
-    print("===========================================\n")
 
-    # Use loaded model from app.state
-    summary = summarize_text(
+# ---------------------------
+# SUMMARIZE ENDPOINT
+# ---------------------------
+def summarize_document(text: str) -> str:
+    if settings.SUMMARIZER_BACKEND == "remote":
+        return model_client.summarize(
+            text,
+            extractive=settings.SUMMARY_EXTRACTIVE,
+            token_budget=settings.SUMMARY_TOKEN_BUDGET,
+        )
+
+    from summarize.model import summarize_text
+    return summarize_text(
         text,
         app.state.tokenizer,
-        app.state.summarizer_model
+        app.state.summarizer_model,
+        extractive=settings.SUMMARY_EXTRACTIVE,
+        token_budget=settings.SUMMARY_TOKEN_BUDGET,
+        embed_fn=embed_chunks,
     )
 
-    print("\n========== SUMMARY ==========")
-    print(summary)
-    print("===========================================\n")
+
+@app.post("/summarize")
+async def summarize_file(
+    file: UploadFile = File(...),
+    max_length: int = Form(150),
+    min_length: int = Form(50)
+):
+    text = await extract_upload_text(file)
+
+    # Debug preview
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Extracted text preview:\n%s", text[:1000])
+
+    # Use loaded model from app.state
+    with track_stage("summarization"):
+        # off the event loop, so status polls and Q&A keep being served
+        summary = await run_in_threadpool(summarize_document, text)
+
+    logger.debug("Summary:\n%s", summary)
 
     return {
         "filename": file.filename,
@@ -119,11 +217,32 @@ async def summarize_file(
 # ---------------------------
 # SIMPLIFY ENDPOINT
 # ---------------------------
+SIMPLIFY_MODES = ("preview", "page", "stream")
+
+
 @app.post("/simplify")
 async def simplify_endpoint(
     file: Optional[UploadFile] = File(None),
-    text: Optional[str] = Form(None)
+    text: Optional[str] = Form(None),
+    mode: str = Form("preview"),
+    offset: int = Form(0),
+    limit: int = Form(200),
+    content_id: Optional[str] = Form(None),
 ):
+    """
+    mode="preview": first 10 simplified sentences (original behaviour).
+    mode="page": whole-document simplification, sentences [offset, offset+limit).
+    The response carries content_id; send it instead of the file for the next
+    pages so the upload and the extraction are not repeated.
+    mode="stream": whole-document simplification streamed as text/plain,
+    one sentence per line, extracted page by page in bounded memory.
+    """
+    if mode not in SIMPLIFY_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(SIMPLIFY_MODES)}")
+
+    if mode != "preview":
+        return await simplify_full(file, text, mode, offset, limit, content_id)
+
     # Case 1: raw text provided
     if text:
         simplified = simplify_text(text)
@@ -131,32 +250,126 @@ async def simplify_endpoint(
 
     # Case 2: file provided
     if file:
-        filename = file.filename.lower()
-        file_bytes = await file.read()
+        text = await extract_upload_text(file)
+
+        simplified = simplify_text(text)
+
+        return {
+            "filename": file.filename,
+            "simplified_text": simplified
+        }
+
+    raise HTTPException(status_code=400, detail="Provide file or text")
 
-        if filename.endswith(".pdf"):
-            text = extract_text_from_pdf(file_bytes)
 
-        elif filename.endswith(".docx"):
-            text = extract_text_from_docx(file_bytes)
+# page mode: extracted text cached on disk by content hash (sha256 of the upload)
+def _cached_text_path(content_id: str) -> str:
+    return os.path.join(settings.SIMPLIFY_CACHE_DIR, f"{content_id}.txt")
 
-        elif filename.endswith(".txt"):
-            text = extract_text_from_txt(file_bytes)
 
+def _cache_extracted_text(src_path: str, ext: str, content_id: str) -> str:
+    dest = _cached_text_path(content_id)
+    if os.path.exists(dest):
+        os.utime(dest)  # LRU by mtime
+        return dest
+
+    with track_stage("extraction"):
+        text = EXTRACTORS[ext](src_path)
+    if not text or not text.strip():
+        raise HTTPException(status_code=400, detail="No text found in file")
+
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, dest)
+
+    entries = sorted(
+        (e for e in os.scandir(settings.SIMPLIFY_CACHE_DIR) if e.name.endswith(".txt")),
+        key=lambda e: e.stat().st_mtime,
+    )
+    for e in entries[:-settings.SIMPLIFY_CACHE_MAX_FILES]:
+        discard(e.path)
+    return dest
+
+
+def _close(*generators):
+    for g in generators:
+        close = getattr(g, "close", None)
+        if close:
+            close()
+
+
+async def simplify_full(
+    file: Optional[UploadFile], text: Optional[str], mode: str, offset: int, limit: int, content_id: Optional[str]
+):
+    if offset < 0 or not 1 <= limit <= settings.SIMPLIFY_MAX_PAGE_SENTENCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset must be >= 0 and limit between 1 and {settings.SIMPLIFY_MAX_PAGE_SENTENCES}"
+        )
+
+    path = None
+    if text:
+        pieces = [text]
+        content_id = None
+    elif mode == "page" and (file or content_id):
+        if file:
+            ext = upload_ext(file)
+            incoming = temp_upload_path(ext)
+            saved = await save_upload(file, incoming)
+            content_id = saved["sha256"]
+            try:
+                cached = await run_in_threadpool(_cache_extracted_text, incoming, ext, content_id)
+            finally:
+                discard(incoming)
         else:
-            raise HTTPException(
-                status_code=400,
-                detail="Only PDF, DOCX, and TXT files are supported"
-            )
+            cached = _cached_text_path(content_id)
+            if not re.fullmatch(r"[0-9a-f]{64}", content_id) or not os.path.exists(cached):
+                raise HTTPException(status_code=404, detail="Unknown or expired content_id; upload the file again")
+            os.utime(cached)
+        pieces = iter_text_from_txt(cached)
+    elif file:
+        ext = upload_ext(file)
+        path = temp_upload_path(ext)
+        await save_upload(file, path)
+        try:
+            pieces = ITER_EXTRACTORS[ext](path)
+        except Exception:
+            discard(path)
+            raise
+    else:
+        raise HTTPException(status_code=400, detail="Provide file or text")
 
-        if not text or not text.strip():
-            raise HTTPException(status_code=400, detail="No text found in file")
+    sentences = iter_simplified(pieces)
 
-        simplified = simplify_text(text)
+    if mode == "page":
+        def read_page():
+            try:
+                return list(islice(sentences, offset, offset + limit + 1))
+            finally:
+                # stop reading the document once the page is cut out
+                _close(sentences, pieces)
 
+        page = await run_in_threadpool(read_page)
+        has_more = len(page) > limit
         return {
-            "filename": file.filename,
-            "simplified_text": simplified
+            "filename": file.filename if file and not text else None,
+            "content_id": content_id,
+            "offset": offset,
+            "sentences": page[:limit],
+            "next_offset": offset + limit if has_more else None,
         }
 
-    raise HTTPException(status_code=400, detail="Provide file or text")
\ No newline at end of file
+    def stream():
+        try:
+            for sentence in sentences:
+                yield sentence + "\n"
+        finally:
+            _close(sentences, pieces)
+
+    # the temp upload goes with the response, even if the body never starts
+    return StreamingResponse(
+        stream(),
+        media_type="text/plain; charset=utf-8",
+        background=BackgroundTask(discard, path) if path else None,
+    )
@@ -0,0 +1,97 @@
+# metrics.py
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from pymongo import monitoring
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_SECONDS = Histogram(
+    "legalease_stage_seconds",
+    "Duration of pipeline stages (extraction, chunking, embedding, faiss_search, llm_call, generation, ...)",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter(
+    "legalease_stage_errors_total",
+    "Pipeline stages that raised",
+    ["stage"],
+)
+STAGE_ITEMS = Counter(
+    "legalease_stage_items_total",
+    "Items processed per stage (pages, chunks, embeddings, tokens, ...)",
+    ["stage"],
+)
+MONGO_SECONDS = Histogram(
+    "legalease_mongo_command_seconds",
+    "MongoDB command round-trip time",
+    ["command"],
+    buckets=STAGE_BUCKETS,
+)
+MONGO_ERRORS = Counter(
+    "legalease_mongo_command_errors_total",
+    "MongoDB commands that failed",
+    ["command"],
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "legalease_admission_queue_depth",
+    "Requests waiting for an admission slot",
+    ["admission_class"],
+)
+ADMISSION_ACTIVE = Gauge(
+    "legalease_admission_active",
+    "Requests holding an admission slot",
+    ["admission_class"],
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "legalease_admission_wait_seconds",
+    "Time admitted requests spent queued",
+    ["admission_class"],
+    buckets=STAGE_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "legalease_admission_rejected_total",
+    "Requests shed with 503",
+    ["admission_class", "reason"],
+)
+
+
+@contextmanager
+def track_stage(stage: str, timings: dict = None):
+    """
+    Time a block into legalease_stage_seconds{stage=...}. If timings is given
+    the duration (seconds) is also stored in timings[stage].
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + elapsed, 4)
+
+
+def count_items(stage: str, n: int):
+    STAGE_ITEMS.labels(stage).inc(n)
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_SECONDS.labels(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_ERRORS.labels(event.command_name).inc()
+
+
+def render_latest():
+    return generate_latest(), CONTENT_TYPE_LATEST
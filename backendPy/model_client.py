@@ -0,0 +1,137 @@
+# model_client.py
+"""
+Client side of the shared model server (model_server.py).
+
+EMBED_BACKEND=remote makes utils.embedder a ModelClient, and
+SUMMARIZER_BACKEND=remote makes /summarize and the artifact worker use
+ModelClient.summarize, so an API worker loads neither model.
+
+Embeddings come back through shared memory: the client creates a file in
+MODEL_SERVER_SHM_DIR sized for the result, the server writes the matrix
+into it, and the client returns a numpy view over the mapping (no copy, no
+pickling of the array). The file is unlinked as soon as the reply arrives;
+the mapping lives as long as the returned array.
+"""
+import os
+import mmap
+import tempfile
+import threading
+import logging
+from multiprocessing.connection import Client
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SHM_PREFIX = "legalease-emb-"
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+def shm_dir() -> str:
+    # /dev/shm is RAM-backed on Linux; elsewhere fall back to the temp dir
+    path = settings.MODEL_SERVER_SHM_DIR
+    return path if os.path.isdir(path) else tempfile.gettempdir()
+
+
+def authkey() -> bytes:
+    return (settings.MODEL_SERVER_AUTHKEY or settings.SECRET_KEY).encode()
+
+
+class ModelClient:
+    """
+    One connection per thread (multiprocessing connections are not thread
+    safe and API requests run in a thread pool); reconnects once if the
+    server restarted.
+    """
+
+    def __init__(self, address: str = None):
+        self.address = address or settings.MODEL_SERVER_SOCKET
+        self._local = threading.local()
+        self._info = None
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=authkey())
+            self._local.conn = conn
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def call(self, request: dict) -> dict:
+        for attempt in (1, 2):
+            try:
+                conn = self._conn()
+                conn.send(request)
+                reply = conn.recv()
+                break
+            except (EOFError, OSError) as e:
+                self._drop()
+                if attempt == 2:
+                    raise ModelServerError(f"Model server unavailable at {self.address}: {e}")
+                logger.warning("Model server connection lost, reconnecting")
+        if not reply.get("ok"):
+            raise ModelServerError(reply.get("error", "unknown model server error"))
+        return reply
+
+    @property
+    def info(self) -> dict:
+        if self._info is None:
+            self._info = self.call({"op": "info"})
+        return self._info
+
+    # -----------------------------
+    # Embeddings (SentenceTransformer.encode subset, like OnnxEmbedder)
+    # -----------------------------
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        dim = self.info["dim"]
+        if not texts:
+            return np.zeros((0, dim), dtype="float32")
+
+        size = len(texts) * dim * 4
+        fd, path = tempfile.mkstemp(prefix=SHM_PREFIX, dir=shm_dir())
+        mm = None
+        try:
+            try:
+                os.ftruncate(fd, size)
+                mm = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+            self.call({
+                "op": "embed", "texts": texts, "shm": path,
+                "normalize": normalize_embeddings, "batch_size": batch_size,
+            })
+        except BaseException:
+            if mm is not None:
+                mm.close()
+            raise
+        finally:
+            os.unlink(path)
+
+        # the array is a view of the mapping, which stays open as long as the array lives
+        out = np.frombuffer(mm, dtype="float32").reshape(len(texts), dim)
+        return out[0] if single else out
+
+    # -----------------------------
+    # Summarization
+    # -----------------------------
+    def summarize(self, text: str, extractive: bool = True, token_budget: int = 3600) -> str:
+        reply = self.call({"op": "summarize", "text": text, "extractive": extractive, "token_budget": token_budget})
+        return reply["text"]
+
+
+model_client = ModelClient()
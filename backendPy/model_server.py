@@ -0,0 +1,233 @@
+# model_server.py
+"""
+Shared model server: one process owns the e5 embedder and Legal Pegasus and
+serves every API worker over a Unix socket, so API workers can be scaled
+without loading the models again.
+
+    cd backendPy
+    python -m model_server
+    EMBED_BACKEND=remote SUMMARIZER_BACKEND=remote uvicorn main:app --workers 8
+
+Embedding requests from all connections go through one batcher thread. It
+waits up to MODEL_SERVER_BATCH_WAIT_MS for more requests (or until
+MODEL_SERVER_MAX_BATCH texts are pending) and runs a single encode for all
+of them. Each result is written straight into the shared-memory file its
+client created (see model_client.py); only a small header crosses the
+socket. Summaries run one at a time.
+"""
+import os
+import sys
+import mmap
+import time
+import queue
+import logging
+import argparse
+import threading
+from multiprocessing.connection import Listener
+
+import numpy as np
+
+from config import settings
+from model_client import SHM_PREFIX, shm_dir, authkey
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Shared memory
+# -----------------------------
+def write_shared(path: str, array: np.ndarray):
+    # only files this protocol creates, in the shared-memory directory
+    real = os.path.realpath(path)
+    if os.path.dirname(real) != os.path.realpath(shm_dir()) or not os.path.basename(real).startswith(SHM_PREFIX):
+        raise ValueError(f"Refusing to write outside {shm_dir()}")
+
+    fd = os.open(real, os.O_RDWR)
+    try:
+        mm = mmap.mmap(fd, array.nbytes)
+    finally:
+        os.close(fd)
+    view = np.frombuffer(mm, dtype=array.dtype).reshape(array.shape)
+    view[:] = array
+    del view
+    mm.close()
+
+
+# -----------------------------
+# Cross-worker embedding batcher
+# -----------------------------
+class EmbedBatcher:
+    def __init__(self, model, max_batch: int, wait_s: float, encode_batch_size: int):
+        self.model = model
+        self.max_batch = max_batch
+        self.wait_s = wait_s
+        self.encode_batch_size = encode_batch_size
+        self.queue = queue.Queue()
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def embed(self, texts: list, normalize: bool = True, batch_size: int = None) -> np.ndarray:
+        # batch_size: the caller's forward-pass batch size, capped by encode_batch_size
+        job = {"texts": texts, "normalize": normalize, "batch_size": batch_size, "done": threading.Event()}
+        self.queue.put(job)
+        job["done"].wait()
+        if "error" in job:
+            raise job["error"]
+        return job["result"]
+
+    def _collect(self) -> list:
+        jobs = [self.queue.get()]
+        pending = len(jobs[0]["texts"])
+        deadline = time.monotonic() + self.wait_s
+        while pending < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                job = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            pending += len(job["texts"])
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            texts = [t for job in jobs for t in job["texts"]]
+            batch_size = min([self.encode_batch_size] + [j["batch_size"] for j in jobs if j["batch_size"]])
+            try:
+                emb = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                    normalize_embeddings=False,
+                ).astype("float32")
+            except Exception as e:
+                for job in jobs:
+                    job["error"] = e
+                    job["done"].set()
+                continue
+
+            logger.debug("Embedded %d texts for %d requests", len(texts), len(jobs))
+            start = 0
+            for job in jobs:
+                part = emb[start:start + len(job["texts"])]
+                start += len(job["texts"])
+                if job["normalize"]:
+                    part = part / np.clip(np.linalg.norm(part, axis=1, keepdims=True), 1e-12, None)
+                job["result"] = part
+                job["done"].set()
+
+
+# -----------------------------
+# Server
+# -----------------------------
+class ModelServer:
+    def __init__(self, embedder, tokenizer=None, summarizer=None):
+        self.batcher = EmbedBatcher(
+            embedder,
+            max_batch=settings.MODEL_SERVER_MAX_BATCH,
+            wait_s=settings.MODEL_SERVER_BATCH_WAIT_MS / 1000,
+            encode_batch_size=settings.MODEL_SERVER_ENCODE_BATCH_SIZE,
+        )
+        self.dim = int(self.batcher.embed(["dimension probe"]).shape[1])
+        self.tokenizer = tokenizer
+        self.summarizer = summarizer
+        self.summarize_lock = threading.Lock()
+
+    def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "info":
+            return {"ok": True, "dim": self.dim, "summarizer": self.summarizer is not None}
+
+        if op == "embed":
+            emb = self.batcher.embed(
+                request["texts"], normalize=request.get("normalize", False), batch_size=request.get("batch_size")
+            )
+            write_shared(request["shm"], emb)
+            return {"ok": True, "shape": list(emb.shape)}
+
+        if op == "summarize":
+            if self.summarizer is None:
+                return {"ok": False, "error": "Summarizer not loaded on the model server"}
+            from summarize.model import summarize_text
+
+            with self.summarize_lock:
+                text = summarize_text(
+                    request["text"],
+                    self.tokenizer,
+                    self.summarizer,
+                    extractive=request.get("extractive", True),
+                    token_budget=request.get("token_budget", settings.SUMMARY_TOKEN_BUDGET),
+                    embed_fn=lambda chunks: self.batcher.embed(list(chunks), normalize=True),
+                )
+            return {"ok": True, "text": text}
+
+        return {"ok": False, "error": f"Unknown op: {op}"}
+
+    def serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self.handle(request)
+                except Exception as e:
+                    logger.exception("Model server request failed")
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                try:
+                    conn.send(reply)
+                except (EOFError, OSError):
+                    return
+
+    def serve_forever(self, address: str):
+        if os.path.exists(address):
+            os.unlink(address)
+        listener = Listener(address, family="AF_UNIX", authkey=authkey())
+        os.chmod(address, 0o600)
+        logger.info("Model server listening on %s (dim=%d)", address, self.dim)
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception:
+                    # failed handshake (wrong authkey) or client gone
+                    logger.warning("Rejected model server connection", exc_info=True)
+                    continue
+                threading.Thread(target=self.serve_connection, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared embedding + summarization model server")
+    parser.add_argument("--socket", default=settings.MODEL_SERVER_SOCKET)
+    parser.add_argument("--embed-backend", default=settings.MODEL_SERVER_EMBED_BACKEND, help="torch or onnx")
+    parser.add_argument("--no-summarizer", action="store_true", help="serve embeddings only")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    if args.embed_backend == "remote":
+        parser.error("the model server needs a local embedding backend (torch or onnx)")
+
+    # not utils: importing it builds the API-side embedder from EMBED_BACKEND
+    from embedders import load_embedder
+    embedder = load_embedder(args.embed_backend)
+
+    tokenizer = summarizer = None
+    if not args.no_summarizer:
+        from summarize.model import load_summarizer
+        tokenizer, summarizer = load_summarizer()
+
+    ModelServer(embedder, tokenizer, summarizer).serve_forever(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
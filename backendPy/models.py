@@ -1,6 +1,6 @@
 # models.py
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -30,10 +30,18 @@ class QARequest(BaseModel):
     document_id: str
     question: str
     top_k: Optional[int] = 3
+    # False skips the clause-map fast path and always asks the LLM
+    fast_path: Optional[bool] = True
+
+class QABatchRequest(BaseModel):
+    document_id: str
+    questions: List[str]
+    top_k: Optional[int] = 3
 
 class QAResponse(BaseModel):
     answer: str
     contexts: List[str]
+    metadata: Dict[str, Any] = {}
 
 class QAChat(BaseModel):
     question: str
@@ -0,0 +1,125 @@
+# onnx_embedder.py
+import os
+import logging
+
+import numpy as np
+import onnxruntime as ort
+from transformers import AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmbedder:
+    """
+    ONNX Runtime replacement for the SentenceTransformer e5 embedder.
+
+    Implements the subset of SentenceTransformer.encode used in this repo
+    (mean pooling + optional L2 normalisation, like the e5 sentence-transformers
+    config). Inputs are sorted by token length before batching so each batch
+    is padded only to its own longest text.
+    """
+
+    def __init__(self, model_path: str, tokenizer_dir: str, max_seq_length: int = 512, threads: int = 0):
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+        self.max_seq_length = max_seq_length
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    # -----------------------------
+    # Export / quantize
+    # -----------------------------
+    @staticmethod
+    def export(model_name: str, export_dir: str, quantize: bool = False) -> str:
+        """
+        Export model_name to export_dir/model.onnx (once) and, if requested,
+        a dynamically int8-quantized export_dir/model.int8.onnx. Returns the
+        path of the model to load.
+        """
+        fp32_path = os.path.join(export_dir, "model.onnx")
+        int8_path = os.path.join(export_dir, "model.int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            import torch
+            from transformers import AutoModel
+
+            logger.info("Exporting %s to ONNX in %s...", model_name, export_dir)
+            os.makedirs(export_dir, exist_ok=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model = AutoModel.from_pretrained(model_name)
+            model.config.return_dict = False
+            model.eval()
+
+            dummy = tokenizer(["passage: export"], return_tensors="pt")
+            names = ["input_ids", "attention_mask", "token_type_ids"]
+            inputs = tuple(dummy[n] for n in names if n in dummy)
+            dynamic = {n: {0: "batch", 1: "sequence"} for n in names if n in dummy}
+            dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    inputs,
+                    fp32_path,
+                    input_names=[n for n in names if n in dummy],
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic,
+                    opset_version=14,
+                )
+            tokenizer.save_pretrained(export_dir)
+
+        if not quantize:
+            return fp32_path
+
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            logger.info("Quantizing %s to int8...", fp32_path)
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        return int8_path
+
+    @classmethod
+    def from_pretrained(cls, model_name: str, export_dir: str, quantize: bool = False, threads: int = 0):
+        model_path = cls.export(model_name, export_dir, quantize=quantize)
+        return cls(model_path, export_dir, threads=threads)
+
+    # -----------------------------
+    # Encode
+    # -----------------------------
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=False):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        if not sentences:
+            return np.zeros((0, 0), dtype="float32")
+
+        encoded = self.tokenizer(list(sentences), truncation=True, max_length=self.max_seq_length)
+        order = np.argsort([-len(ids) for ids in encoded["input_ids"]], kind="stable")
+
+        out = None
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = self.tokenizer.pad(
+                {k: [encoded[k][i] for i in idx] for k in encoded.keys()},
+                return_tensors="np",
+            )
+            feeds = {k: batch[k].astype("int64") for k in self.input_names if k in batch}
+            if "token_type_ids" in self.input_names and "token_type_ids" not in feeds:
+                feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+
+            hidden = self.session.run(["last_hidden_state"], feeds)[0]
+            mask = feeds["attention_mask"][..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            if out is None:
+                out = np.empty((len(sentences), pooled.shape[1]), dtype="float32")
+            out[idx] = pooled
+
+        if normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+
+        return out[0] if single else out
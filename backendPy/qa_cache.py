@@ -0,0 +1,118 @@
+# qa_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import settings
+
+
+class AnswerCache:
+    """
+    Per-document semantic cache of Q&A answers keyed by question embedding.
+
+    A lookup is a hit when a cached question for the same document version
+    has cosine similarity >= threshold with the new question. Entries expire
+    after ttl_seconds; each document keeps at most max_entries_per_doc
+    answers and at most max_docs documents are cached (both LRU).
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: int, max_entries_per_doc: int, max_docs: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_doc = max_entries_per_doc
+        self.max_docs = max_docs
+
+        self._docs = OrderedDict()  # doc_id -> {"version": str, "entries": OrderedDict}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _entries_for(self, doc_id: str, version: str):
+        bucket = self._docs.get(doc_id)
+        if bucket is None or bucket["version"] != version:
+            return None
+        now = time.time()
+        entries = bucket["entries"]
+        for key in [k for k, e in entries.items() if now - e["created_at"] > self.ttl_seconds]:
+            del entries[key]
+        return entries
+
+    def lookup(self, doc_id: str, version: str, q_emb: np.ndarray):
+        """
+        Returns (entry, similarity). entry is None on a miss.
+        """
+        q = np.asarray(q_emb, dtype="float32").reshape(-1)
+        with self._lock:
+            entries = self._entries_for(doc_id, version)
+            if not entries:
+                self.misses += 1
+                return None, 0.0
+
+            keys = list(entries.keys())
+            matrix = np.stack([entries[k]["embedding"] for k in keys])
+            sims = matrix @ q
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+
+            if similarity < self.threshold:
+                self.misses += 1
+                return None, similarity
+
+            entries.move_to_end(keys[best])
+            self._docs.move_to_end(doc_id)
+            self.hits += 1
+            return entries[keys[best]], similarity
+
+    def store(self, doc_id: str, version: str, question: str, q_emb: np.ndarray, answer: str, contexts: list, **extra):
+        with self._lock:
+            bucket = self._docs.get(doc_id)
+            if bucket is None or bucket["version"] != version:
+                bucket = {"version": version, "entries": OrderedDict()}
+                self._docs[doc_id] = bucket
+            self._docs.move_to_end(doc_id)
+
+            self._seq += 1
+            bucket["entries"][self._seq] = {
+                "question": question,
+                "embedding": np.asarray(q_emb, dtype="float32").reshape(-1).copy(),
+                "answer": answer,
+                "contexts": list(contexts),
+                "created_at": time.time(),
+                **extra,
+            }
+
+            while len(bucket["entries"]) > self.max_entries_per_doc:
+                bucket["entries"].popitem(last=False)
+            while len(self._docs) > self.max_docs:
+                self._docs.popitem(last=False)
+
+    def invalidate(self, doc_id: str):
+        with self._lock:
+            self._docs.pop(doc_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "documents": len(self._docs),
+                "entries": sum(len(b["entries"]) for b in self._docs.values()),
+            }
+
+
+answer_cache = AnswerCache(
+    threshold=settings.QA_CACHE_SIMILARITY,
+    ttl_seconds=settings.QA_CACHE_TTL_SECONDS,
+    max_entries_per_doc=settings.QA_CACHE_MAX_ENTRIES_PER_DOC,
+    max_docs=settings.QA_CACHE_MAX_DOCS,
+)
+
+
+def document_version(doc: dict) -> str:
+    """
+    Cache key component that changes whenever a document is (re)processed.
+    """
+    return str(doc.get("updated_at") or doc.get("created_at") or "")
@@ -1,16 +1,27 @@
 # qa_router.py
+import asyncio
+import threading
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from models import QARequest, QAResponse, QAChat
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from models import QARequest, QABatchRequest, QAResponse, QAChat
 from auth import get_current_user
-from utils import retrieve_chunks_for_doc, generate_with_openrouter
-from db import chats_col
+from utils import retrieve_chunk_hits, retrieve_chunk_hits_batch, embed_query, embed_queries
+from generation import generate, generate_stream, generation_router, GenerationError
+from context_packer import pack_contexts, estimate_tokens
+from db import chats_col, documents_col
+from config import settings
+from qa_cache import answer_cache, document_version
+from clause_map import match_question
 from datetime import datetime
 from bson import ObjectId
 import json
+import logging
 
 
 router = APIRouter(prefix="/qa", tags=["qa"])
+logger = logging.getLogger(__name__)
 
 
 
@@ -38,25 +49,312 @@ def get_document_chats(document_id: str, user: dict = Depends(get_current_user))
         for chat in chats
     ]
 
-@router.post("/ask", response_model=QAResponse)
-def ask_question(req: QARequest, user: dict = Depends(get_current_user)):
-    # check document exists & processed
-    from db import documents_col
-    doc = documents_col.find_one({"_id": ObjectId(req.document_id)})
+@router.get("/backends")
+def get_generation_backends(user: dict = Depends(get_current_user)):
+    """
+    Circuit state and p50/p99 latency of each configured generation backend.
+    """
+    return generation_router.stats()
+
+def _get_ready_document(document_id: str):
+    try:
+        doc_obj_id = ObjectId(document_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid document ID")
+
+    doc = documents_col.find_one({"_id": doc_obj_id})
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    
+
     # accept both 'READY' and 'processed' statuses
     if doc.get("status") not in ["READY", "processed"]:
         raise HTTPException(status_code=400, detail="Document not yet processed")
+    return doc
+
+
+def _cache_lookup(document_id: str, version: str, q_emb):
+    if not settings.QA_CACHE_ENABLED:
+        return None, {"status": "disabled"}
+    cached, similarity = answer_cache.lookup(document_id, version, q_emb)
+    cache_meta = {"status": "hit" if cached else "miss", "similarity": round(similarity, 4), **answer_cache.stats()}
+    if cached:
+        cache_meta["matched_question"] = cached["question"]
+    return cached, cache_meta
+
+
+def _chat_doc(user: dict, document_id: str, question: str, answer: str, contexts: list, cache_meta: dict, packing: dict):
+    return {
+        "user_id": ObjectId(user["id"]),
+        "document_id": ObjectId(document_id),
+        "question": question,
+        "answer": answer,
+        "contexts": contexts,
+        "cache": cache_meta["status"],
+        "prompt_tokens": packing["prompt_tokens"] if packing else 0,
+        "created_at": datetime.utcnow()
+    }
+
 
-    # retrieve top-k relevant chunks
-    contexts, scores = retrieve_chunks_for_doc(req.document_id, req.question, k=req.top_k, fetch_k=20)
+def _fast_path_lookup(doc: dict, q_emb):
+    """
+    The mapped clause for a standard question (governing law, notice period,
+    ...) as (answer, contexts, meta), or None when the question is not a
+    standard one or the document has no clause of that type.
+    """
+    clause_map = doc.get("clause_map")
+    if not settings.QA_FAST_PATH_ENABLED or not clause_map:
+        return None
+    clause_type, similarity = match_question(q_emb)
+    spans = clause_map.get(clause_type) if clause_type else None
+    # maps built before sentence spans and the margin gate are not trusted
+    if not spans or "margin" not in spans[0]:
+        return None
+    contexts = [span["context"] for span in spans]
+    meta = {
+        "clause_type": clause_type,
+        "similarity": round(similarity, 4),
+        "spans": [{k: span[k] for k in ("chunk", "score", "margin", "start", "end")} for span in spans],
+    }
+    # the answer is the matched clause sentence; the contexts show the surrounding chunks
+    return spans[0]["text"], contexts, meta
+
+
+@router.post("/ask", response_model=QAResponse)
+def ask_question(req: QARequest, user: dict = Depends(get_current_user)):
+    # check document exists & processed
+    doc = _get_ready_document(req.document_id)
+    q_emb = embed_query(req.question)
+
+    # standard clause questions are answered from the clause map, no LLM call
+    fast = _fast_path_lookup(doc, q_emb) if req.fast_path else None
+    if fast:
+        answer, contexts, fast_meta = fast
+        cache_meta = {"status": "fast_path"}
+        chats_col.insert_one(_chat_doc(user, req.document_id, req.question, answer, contexts, cache_meta, None))
+        return QAResponse(answer=answer, contexts=contexts, metadata={"cache": cache_meta, "fast_path": fast_meta})
+
+    # semantic answer cache: same document version + near-identical question
+    version = f"{document_version(doc)}:k={req.top_k}"
+    cached, cache_meta = _cache_lookup(req.document_id, version, q_emb)
+
+    packing = None
+    if cached:
+        answer, contexts = cached["answer"], cached["contexts"]
+    else:
+        hits = retrieve_chunk_hits(req.document_id, req.question, fetch_k=settings.QA_FETCH_K, q_emb=q_emb)
+        answer, contexts, packing = _answer_from_hits(req.document_id, req.question, hits, req.top_k)
+        if settings.QA_CACHE_ENABLED:
+            answer_cache.store(req.document_id, version, req.question, q_emb, answer, contexts)
+
+    # save chat
+    chats_col.insert_one(_chat_doc(user, req.document_id, req.question, answer, contexts, cache_meta, packing))
+
+    return QAResponse(answer=answer, contexts=contexts, metadata={"cache": cache_meta, "packing": packing})
+
+
+# -----------------------------
+# Token streaming (Server-Sent Events)
+# -----------------------------
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _pieces_from_thread(prompt: str, cancel: threading.Event):
+    """
+    Runs the blocking upstream stream on its own thread and hands each piece
+    to the event loop. Once cancel is set the thread stops at the next piece
+    and closes the upstream response.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # loop closed under us (shutdown)
+            cancel.set()
+
+    def pump():
+        pieces = None
+        try:
+            backend, pieces = generate_stream(prompt, max_tokens=300, temperature=0.0)
+            put(("backend", backend))
+            for piece in pieces:
+                if cancel.is_set():
+                    break
+                put(("piece", piece))
+            put((done, None))
+        except Exception as e:
+            put(("error", e))
+        finally:
+            if pieces is not None:
+                pieces.close()
+
+    threading.Thread(target=pump, name="qa-stream", daemon=True).start()
+    while True:
+        kind, value = await queue.get()
+        if kind is done:
+            return
+        if kind == "error":
+            raise value
+        yield kind, value
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(req: QARequest, user: dict = Depends(get_current_user)):
+    """
+    /qa/ask as Server-Sent Events: a "contexts" event as soon as retrieval is
+    done, "token" events as the answer is generated, then "done" with the full
+    answer and metadata (or "error"). The chat is saved once the answer is
+    complete. If the client disconnects, the upstream completion is closed
+    and nothing is saved.
+    """
+    doc = await run_in_threadpool(_get_ready_document, req.document_id)
+    q_emb = await run_in_threadpool(embed_query, req.question)
+
+    fast = await run_in_threadpool(_fast_path_lookup, doc, q_emb) if req.fast_path else None
+    version = f"{document_version(doc)}:k={req.top_k}"
+    if fast:
+        answer, contexts, fast_meta = fast
+        cache_meta = {"status": "fast_path"}
+        metadata = {"cache": cache_meta, "fast_path": fast_meta}
+    else:
+        cached, cache_meta = _cache_lookup(req.document_id, version, q_emb)
+        metadata = {"cache": cache_meta, "packing": None}
+        if cached:
+            answer, contexts = cached["answer"], cached["contexts"]
+        else:
+            answer = None
+            hits = await run_in_threadpool(
+                retrieve_chunk_hits, req.document_id, req.question, settings.QA_FETCH_K, q_emb
+            )
+            prompt, spans, packing = await run_in_threadpool(
+                _prepare_prompt, req.document_id, req.question, hits, req.top_k
+            )
+            contexts = [span["text"] for span in spans]
+            metadata["packing"] = packing
+
+    async def stream():
+        nonlocal answer
+        yield _sse("contexts", {"contexts": contexts, "metadata": metadata})
+
+        if answer is None:
+            cancel = threading.Event()
+            pieces = []
+            try:
+                async for kind, value in _pieces_from_thread(prompt, cancel):
+                    if kind == "backend":
+                        metadata["packing"]["backend"] = value
+                        continue
+                    pieces.append(value)
+                    yield _sse("token", {"text": value})
+            except Exception as e:
+                logger.warning("qa stream document=%s failed: %s", req.document_id, e)
+                yield _sse("error", {"detail": f"Answer generation unavailable: {e}"})
+                return
+            finally:
+                # also reached when the client disconnects (task cancelled)
+                cancel.set()
+            answer = "".join(pieces).strip()
+            if settings.QA_CACHE_ENABLED:
+                answer_cache.store(req.document_id, version, req.question, q_emb, answer, contexts)
+        else:
+            yield _sse("token", {"text": answer})
+
+        await run_in_threadpool(
+            chats_col.insert_one,
+            _chat_doc(user, req.document_id, req.question, answer, contexts, metadata["cache"], metadata.get("packing")),
+        )
+        yield _sse("done", {"answer": answer, "metadata": metadata})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/ask-batch")
+async def ask_question_batch(req: QABatchRequest, user: dict = Depends(get_current_user)):
+    """
+    Answer a list of questions about one document. All questions are encoded
+    in one embedder call and searched with one FAISS query matrix; LLM calls
+    run in parallel (QA_BATCH_CONCURRENCY) and results stream back as NDJSON
+    lines in completion order. Chats are saved with one insert_many.
+    """
+    if not req.questions:
+        raise HTTPException(status_code=400, detail="Provide at least one question")
+    if len(req.questions) > settings.QA_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.QA_BATCH_MAX_QUESTIONS} questions per batch")
+
+    doc = await run_in_threadpool(_get_ready_document, req.document_id)
+    version = f"{document_version(doc)}:k={req.top_k}"
+
+    q_embs = await run_in_threadpool(embed_queries, req.questions)
+    lookups = [_cache_lookup(req.document_id, version, q_embs[i]) for i in range(len(req.questions))]
+
+    misses = [i for i, (cached, _) in enumerate(lookups) if not cached]
+    hits_by_question = {}
+    if misses:
+        batch_hits = await run_in_threadpool(
+            retrieve_chunk_hits_batch, req.document_id, q_embs[misses], settings.QA_FETCH_K
+        )
+        hits_by_question = dict(zip(misses, batch_hits))
+
+    semaphore = asyncio.Semaphore(settings.QA_BATCH_CONCURRENCY)
+
+    async def answer_one(i: int):
+        question = req.questions[i]
+        cached, cache_meta = lookups[i]
+        if cached:
+            return i, cached["answer"], cached["contexts"], cache_meta, None
+
+        async with semaphore:
+            try:
+                answer, contexts, packing = await run_in_threadpool(
+                    _answer_from_hits, req.document_id, question, hits_by_question[i], req.top_k
+                )
+            except HTTPException as e:
+                return i, None, None, cache_meta, {"error": e.detail}
+        if settings.QA_CACHE_ENABLED:
+            answer_cache.store(req.document_id, version, question, q_embs[i], answer, contexts)
+        return i, answer, contexts, cache_meta, packing
+
+    async def stream():
+        chat_docs = []
+        tasks = [asyncio.ensure_future(answer_one(i)) for i in range(len(req.questions))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                i, answer, contexts, cache_meta, packing = await next_done
+                if answer is None:
+                    yield json.dumps({"index": i, "question": req.questions[i], "error": packing["error"]}) + "\n"
+                    continue
+
+                chat_docs.append(_chat_doc(user, req.document_id, req.questions[i], answer, contexts, cache_meta, packing))
+                yield json.dumps({
+                    "index": i,
+                    "question": req.questions[i],
+                    "answer": answer,
+                    "contexts": contexts,
+                    "metadata": {"cache": cache_meta, "packing": packing},
+                }) + "\n"
+        finally:
+            for t in tasks:
+                t.cancel()
+            if chat_docs:
+                await run_in_threadpool(chats_col.insert_many, chat_docs)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _build_prompt(question: str, spans: list) -> str:
     context_text = "\n\n---\n\n".join(
-        [f"Context {i+1} (relevance: {score:.2f}): {ctx}" for i, (ctx, score) in enumerate(zip(contexts, scores))]
+        [f"Context {i+1} (relevance: {span['score']:.2f}): {span['text']}" for i, span in enumerate(spans)]
     )
 
-    prompt = f"""<|system|>
+    return f"""<|system|>
 You are a precise legal assistant. Answer questions based ONLY on the provided contract excerpts.
 Be concise, cite relevant sections if possible, and if information is missing, say: "The document does not specify this."
 <|end|>
@@ -65,23 +363,32 @@ Be concise, cite relevant sections if possible, and if information is missing, s
 Contract excerpts:
 {context_text}
 
-Question: {req.question}
+Question: {question}
 <|end|>
 
 <|assistant|>
 """
-    answer = generate_with_openrouter(prompt, max_tokens=300, temperature=0.0)
 
-    # save chat
-    chat_doc = {
-        "user_id": ObjectId(user["id"]),
-        "document_id": ObjectId(req.document_id),
-        "question": req.question,
-        "answer": answer,
-        "contexts": contexts,
-        "created_at": datetime.utcnow()
-    }
-    chats_col.insert_one(chat_doc)
 
-    return QAResponse(answer=answer, contexts=contexts)
+def _prepare_prompt(document_id: str, question: str, hits: list, top_k: int):
+    # merge overlapping neighbours among the top-k chunks, fit the token budget
+    spans, packing = pack_contexts(hits[:top_k], settings.QA_CONTEXT_TOKEN_BUDGET)
+
+    prompt = _build_prompt(question, spans)
+    packing["prompt_tokens"] = estimate_tokens(prompt)
+    logger.info(
+        "qa document=%s prompt_tokens=%d context_tokens=%d raw_tokens=%d spans=%d/%d dropped=%d",
+        document_id, packing["prompt_tokens"], packing["context_tokens"], packing["raw_tokens"],
+        packing["packed"], packing["spans"], packing["dropped"],
+    )
+    return prompt, spans, packing
 
+
+def _answer_from_hits(document_id: str, question: str, hits: list, top_k: int):
+    prompt, spans, packing = _prepare_prompt(document_id, question, hits, top_k)
+    try:
+        answer, backend = generate(prompt, max_tokens=300, temperature=0.0)
+    except GenerationError as e:
+        raise HTTPException(status_code=503, detail=f"Answer generation unavailable: {e}")
+    packing["backend"] = backend
+    return answer, [span["text"] for span in spans], packing
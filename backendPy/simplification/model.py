@@ -1,20 +1,81 @@
 import re
+from itertools import islice
+from typing import Iterable, Iterator
 from .uslt_rules import LEGAL_SIMPLIFICATION_RULES
 
+# compiled once, longest phrase first (so "shall not" wins over "shall")
+_RULES = [
+    (re.compile(rf"\b{k}\b", flags=re.IGNORECASE), LEGAL_SIMPLIFICATION_RULES[k])
+    for k in sorted(LEGAL_SIMPLIFICATION_RULES, key=len, reverse=True)
+]
+_SENTENCE_END = re.compile(r'[.!?]+')
+
+PREVIEW_SENTENCES = 10
+MAX_SENTENCE_CHARS = 2000
+
+
 def apply_rules(text: str) -> str:
-    for k in sorted(LEGAL_SIMPLIFICATION_RULES, key=len, reverse=True):
-        v = LEGAL_SIMPLIFICATION_RULES[k]
-        text = re.sub(rf"\b{k}\b", v, text, flags=re.IGNORECASE)
+    for pattern, v in _RULES:
+        text = pattern.sub(v, text)
     return text
 
-def simplify_text(text: str) -> str:
-    text = apply_rules(text)
-    sentences = re.split(r'[.!?]+', text)
 
-    simplified = []
-    for s in sentences:
-        words = s.strip().split()
-        if 5 <= len(words) <= 25:
-            simplified.append(s.strip())
+def iter_sentences(pieces: Iterable[str], max_chars: int = MAX_SENTENCE_CHARS) -> Iterator[str]:
+    """
+    Split a stream of text pieces (pages, paragraphs, read() blocks) into
+    sentences the same way simplify_text does, holding only the unfinished
+    sentence in memory. Text without terminators (tables, OCR output) is cut
+    at whitespace once it exceeds max_chars.
+    """
+    buffer = ""
+    for piece in pieces:
+        # the carried-over text has no terminator except maybe a run at its end,
+        # so only that run and the new piece are scanned
+        scan_from = len(buffer)
+        while scan_from and buffer[scan_from - 1] in ".!?":
+            scan_from -= 1
+        buffer += piece
+        last = 0
+        for m in _SENTENCE_END.finditer(buffer, scan_from):
+            # a terminator at the very end may continue in the next piece ("..")
+            if m.end() == len(buffer):
+                break
+            yield buffer[last:m.start()]
+            last = m.end()
+        buffer = buffer[last:]
+
+        while len(buffer) > max_chars:
+            cut = buffer.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+    for part in _SENTENCE_END.split(buffer):
+        yield part
+
+
+def iter_simplified(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Whole-document simplification: every sentence of the input, rewritten
+    with the plain-language rules, one sentence at a time.
+    """
+    for sentence in iter_sentences(pieces):
+        sentence = " ".join(apply_rules(sentence).split())
+        if sentence:
+            yield sentence + "."
+
+
+def iter_preview_sentences(pieces: Iterable[str]) -> Iterator[str]:
+    for sentence in iter_sentences(pieces):
+        sentence = apply_rules(sentence).strip()
+        if 5 <= len(sentence.split()) <= 25:
+            yield sentence
+
+
+def simplify_text(text: str) -> str:
+    """
+    Preview: the first 10 simplified sentences of 5-25 words.
+    """
+    simplified = list(islice(iter_preview_sentences([text]), PREVIEW_SENTENCES))
 
-    return ". ".join(simplified[:10]) + "."
+    return ". ".join(simplified) + "."
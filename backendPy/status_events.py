@@ -0,0 +1,121 @@
+# status_events.py
+"""
+Push-based document status for GET /documents/events (SSE).
+
+Events are dicts keyed by document_id carrying whichever of status, stage,
+chunks_count, stage_durations, error and artifacts changed; clients merge
+them into what they already have.
+
+STATUS_EVENTS_SOURCE="local": the ingestion pipeline publishes straight to
+subscribers in the same process. Good for a single uvicorn worker.
+
+STATUS_EVENTS_SOURCE="mongo": every process tails a change stream on the
+documents collection (needs a replica set) and publishes what it sees, so a
+stream on one worker receives progress from uploads processed by another.
+The pipeline's own publish() calls are skipped in this mode; the Mongo
+writes they accompany reach every process through the change stream.
+"""
+import time
+import asyncio
+import logging
+import threading
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EVENT_FIELDS = ("status", "stage", "chunks_count", "stage_durations", "error", "artifacts")
+
+
+def event_from_document(doc: dict) -> dict:
+    event = {"document_id": str(doc["_id"])}
+    for key in EVENT_FIELDS:
+        if key in doc:
+            event[key] = doc[key]
+    if "artifacts" in event:
+        event["artifacts"] = {k: a.get("status") for k, a in event["artifacts"].items()}
+    return event
+
+
+class StatusBus:
+    def __init__(self):
+        self._subscribers = {}  # user_id -> {queue: loop}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    # -----------------------------
+    # Subscribers (event loop side)
+    # -----------------------------
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.STATUS_STREAM_QUEUE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subs = self._subscribers.get(user_id, {})
+            subs.pop(queue, None)
+            if not subs:
+                self._subscribers.pop(user_id, None)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        # a slow client loses its oldest events rather than blocking publishers
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    # -----------------------------
+    # Publishers (any thread)
+    # -----------------------------
+    def _deliver(self, user_id: str, event: dict):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # loop closed under us (shutdown)
+                self.unsubscribe(user_id, queue)
+
+    def publish(self, user_id: str, document_id: str, **fields):
+        if not user_id or settings.STATUS_EVENTS_SOURCE != "local":
+            return
+        fields = {k: v for k, v in fields.items() if k in EVENT_FIELDS}
+        self._deliver(user_id, {"document_id": document_id, **fields})
+
+    # -----------------------------
+    # Mongo change stream
+    # -----------------------------
+    def start_mongo_watcher(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="status-change-stream", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        from db import documents_col
+
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        resume_token = None
+        while True:
+            try:
+                with documents_col.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        self._on_change(change)
+            except Exception:
+                logger.warning("Document change stream interrupted, reconnecting", exc_info=True)
+                time.sleep(1)
+
+    def _on_change(self, change: dict):
+        if change["operationType"] == "update":
+            updated = change.get("updateDescription", {}).get("updatedFields", {})
+            if not any(k.split(".")[0] in EVENT_FIELDS for k in updated):
+                return
+        doc = change.get("fullDocument")
+        if doc and doc.get("user_id"):
+            self._deliver(doc["user_id"], event_from_document(doc))
+
+
+status_bus = StatusBus()
@@ -1,11 +1,19 @@
 from docx import Document
 import io
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    doc = Document(io.BytesIO(file_bytes))
+def extract_text_from_docx(source) -> str:
+    # source: raw bytes or a file path
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    doc = Document(source)
     text = ""
 
     for para in doc.paragraphs:
         text += para.text + "\n"
 
     return text.strip()
+
+def iter_text_from_docx(path: str):
+    # paragraph by paragraph, for streaming consumers
+    for para in Document(path).paragraphs:
+        yield para.text + "\n"
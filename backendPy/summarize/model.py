@@ -1,16 +1,21 @@
 from transformers import PegasusTokenizer, AutoModelForSeq2SeqLM
 import torch
 import re
+import math
+import logging
 from typing import List
 import time
 
+from metrics import track_stage
+
 MODEL_NAME = "nsi319/legal-pegasus"
 device = "cuda" if torch.cuda.is_available() else "cpu"
+logger = logging.getLogger(__name__)
 
 
 # ---------------- LOAD MODEL ONCE ----------------
 def load_summarizer():
-    print("Loading summarization model...")
+    logger.info("Loading summarization model...")
 
     # ✅ FORCE PEGASUS TOKENIZER (SentencePiece)
     tokenizer = PegasusTokenizer.from_pretrained(MODEL_NAME)
@@ -20,7 +25,7 @@ def load_summarizer():
     ).to(device)
 
     model.eval()
-    print("Model loaded.")
+    logger.info("Model loaded.")
 
     return tokenizer, model
 
@@ -77,87 +82,177 @@ def is_valid_chunk(text: str) -> bool:
     return True
 
 
+# ---------------- EXTRACTIVE PRE-SELECTION ----------------
+def centroid_scores(chunks: List[str], embed_fn) -> List[float]:
+    """
+    Cosine similarity of each chunk to the document centroid, using
+    embed_fn (list of texts -> L2-normalised numpy matrix, e.g. the e5
+    embed_chunks).
+    """
+    emb = embed_fn(chunks)
+    centroid = emb.mean(axis=0)
+    centroid = centroid / max(float((centroid ** 2).sum()) ** 0.5, 1e-12)
+    return (emb @ centroid).tolist()
+
+
+def textrank_scores(chunks: List[str], damping: float = 0.85, iterations: int = 30) -> List[float]:
+    """
+    Lexical TextRank over chunks (word-overlap similarity), used when no
+    embedder is available.
+    """
+    words = [set(re.findall(r"[a-z]{3,}", c.lower())) for c in chunks]
+    n = len(chunks)
+    weights = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if len(words[i]) > 1 and len(words[j]) > 1:
+                w = len(words[i] & words[j]) / (math.log(len(words[i])) + math.log(len(words[j])))
+                weights[i][j] = weights[j][i] = w
+
+    totals = [sum(row) or 1.0 for row in weights]
+    scores = [1.0] * n
+    for _ in range(iterations):
+        scores = [
+            (1 - damping) + damping * sum(weights[j][i] / totals[j] * scores[j] for j in range(n))
+            for i in range(n)
+        ]
+    return scores
+
+
+def select_chunks(chunks: List[str], token_counts: List[int], scores: List[float], token_budget: int) -> List[str]:
+    """
+    Highest scoring chunks that fit in token_budget (always at least one),
+    returned in document order.
+    """
+    ranked = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)
+    chosen, used = [], 0
+    for i in ranked:
+        if chosen and used + token_counts[i] > token_budget:
+            continue
+        chosen.append(i)
+        used += token_counts[i]
+    return [chunks[i] for i in sorted(chosen)]
+
+
+# ---------------- GENERATION ----------------
+def input_token_limit(tokenizer, model) -> int:
+    # Pegasus has 1024 positions; never ask the tokenizer for more than the model takes
+    limits = [1024, getattr(model.config, "max_position_embeddings", None), tokenizer.model_max_length]
+    return min(l for l in limits if l)
+
+
+def generate_summary(
+    text: str, tokenizer, model, max_length: int, min_length: int, num_beams: int, max_input_tokens: int = 1024
+) -> str:
+    inputs = tokenizer(
+        "summarize: " + text,
+        return_tensors="pt",
+        max_length=max_input_tokens,
+        truncation=True,
+        padding="longest"
+    ).to(device)
+
+    with torch.no_grad(), track_stage("generation"):
+        outputs = model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            max_length=max_length,
+            min_length=min_length,
+            num_beams=num_beams,
+            length_penalty=2.0,
+            no_repeat_ngram_size=3,
+            early_stopping=True
+        )
+
+    return tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+
 # ---------------- MAIN SUMMARIZER ----------------
-def summarize_text(text: str, tokenizer, model) -> str:
+def summarize_text(
+    text: str,
+    tokenizer,
+    model,
+    extractive: bool = True,
+    token_budget: int = 3600,
+    embed_fn=None,
+) -> str:
+    """
+    extractive=True: long documents are summarized from the most central
+    chunks that fit in token_budget (e5 centroid similarity when embed_fn is
+    given, lexical TextRank otherwise), then the chunk summaries are merged
+    by a reduce pass. The reduce pass only runs when chunks were actually
+    dropped; summaries that do not fit the model input are reduced in groups
+    first, so nothing within token_budget is cut off. Otherwise, and with
+    extractive=False, the chunk summaries are joined (previous behaviour).
+    """
     if not text or not text.strip():
         return ""
 
-    print("Cleaning text...")
+    logger.debug("Cleaning text...")
     text = clean_text(text)
 
-    print("Extracting key clauses...")
+    logger.debug("Extracting key clauses...")
     text = extract_key_clauses(text)
 
     word_count = len(text.split())
 
     # -------- SHORT DOC --------
     if word_count < 250:
-        print("Short document detected")
-
-        text = "summarize: " + text
-
-        inputs = tokenizer(
-            text,
-            return_tensors="pt",
-            max_length=1024,
-            truncation=True,
-            padding="longest"
-        ).to(device)
-
-        with torch.no_grad():
-            outputs = model.generate(
-                inputs["input_ids"],
-                attention_mask=inputs["attention_mask"],
-                max_length=80,
-                min_length=20,
-                num_beams=4,
-                length_penalty=2.0,
-                no_repeat_ngram_size=3,
-                early_stopping=True
-            )
-
-        return tokenizer.decode(outputs[0], skip_special_tokens=True)
+        logger.debug("Short document detected")
+        return generate_summary(text, tokenizer, model, max_length=80, min_length=20, num_beams=4)
 
     # -------- LONG DOC --------
-    print("Chunking text...")
+    logger.debug("Chunking text...")
     chunks = chunk_text_tokens(text, tokenizer)
+    chunks = [c for c in chunks if is_valid_chunk(c)]
+
+    selected = False
+    if extractive and len(chunks) > 1:
+        token_counts = [len(tokenizer.encode(c)) for c in chunks]
+        if sum(token_counts) > token_budget:
+            scores = centroid_scores(chunks, embed_fn) if embed_fn else textrank_scores(chunks)
+            kept = select_chunks(chunks, token_counts, scores, token_budget)
+            logger.debug("Extractive pre-selection kept %d/%d chunks", len(kept), len(chunks))
+            selected = len(kept) < len(chunks)
+            chunks = kept
 
     summaries = []
 
     for i, chunk in enumerate(chunks):
-        if not is_valid_chunk(chunk):
-            continue
-
-        print(f"Summarizing chunk {i+1}/{len(chunks)}...")
+        logger.debug("Summarizing chunk %d/%d...", i + 1, len(chunks))
         start = time.time()
 
-        chunk = "summarize: " + chunk
-
-        inputs = tokenizer(
-            chunk,
-            return_tensors="pt",
-            max_length=1024,
-            truncation=True,
-            padding="longest"
-        ).to(device)
-
-        with torch.no_grad():
-            outputs = model.generate(
-                inputs["input_ids"],
-                attention_mask=inputs["attention_mask"],
-                max_length=180,
-                min_length=40,
-                num_beams=5,
-                length_penalty=2.0,
-                no_repeat_ngram_size=3,
-                early_stopping=True
-            )
-
-        summary = tokenizer.decode(outputs[0], skip_special_tokens=True)
+        summary = generate_summary(chunk, tokenizer, model, max_length=180, min_length=40, num_beams=5)
 
         if summary:
             summaries.append(summary)
 
-        print(f"Chunk time: {time.time()-start:.2f}s")
-
-    return " ".join(summaries)
\ No newline at end of file
+        logger.debug("Chunk time: %.2fs", time.time() - start)
+
+    if not selected or len(summaries) < 2:
+        return " ".join(summaries)
+
+    # -------- REDUCE --------
+    limit = input_token_limit(tokenizer, model) - 8  # room for the "summarize: " prefix
+    while True:
+        groups, group, used = [], [], 0
+        for summary in summaries:
+            n = len(tokenizer.encode(summary))
+            if group and used + n > limit:
+                groups.append(group)
+                group, used = [], 0
+            group.append(summary)
+            used += n
+        groups.append(group)
+        if len(groups) == 1 or len(groups) == len(summaries):
+            break  # fits, or cannot shrink further (the final pass truncates)
+        logger.debug("Reducing %d chunk summaries in %d groups...", len(summaries), len(groups))
+        summaries = [
+            generate_summary(" ".join(g), tokenizer, model, max_length=180, min_length=40, num_beams=4, max_input_tokens=limit)
+            for g in groups
+        ]
+
+    logger.debug("Merging %d chunk summaries...", len(summaries))
+    return generate_summary(
+        " ".join(summaries), tokenizer, model, max_length=256, min_length=60, num_beams=4, max_input_tokens=limit
+    )
@@ -1,8 +1,27 @@
 from pypdf import PdfReader
 import io
+import mmap
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_bytes))
+def extract_text_from_pdf(source) -> str:
+    """
+    source: raw bytes, or a file path (read through a memory-mapped view
+    instead of an in-memory copy).
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return _extract(PdfReader(io.BytesIO(source)))
+
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        return _extract(PdfReader(view))
+
+def iter_text_from_pdf(path: str):
+    # page by page, for streaming consumers
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        for page in PdfReader(view).pages:
+            page_text = page.extract_text()
+            if page_text:
+                yield page_text + "\n"
+
+def _extract(reader: PdfReader) -> str:
     text = ""
 
     for page in reader.pages:
@@ -1,7 +1,51 @@
-def extract_text_from_txt(file_bytes: bytes) -> str:
+import os
+import mmap
+import codecs
+
+BLOCK_SIZE = 64 * 1024
+
+def extract_text_from_txt(source) -> str:
+    """
+    source: raw bytes, or a file path (decoded straight from a memory-mapped
+    view instead of an in-memory bytes copy).
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return _decode(source)
+
+    if os.path.getsize(source) == 0:
+        return ""
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        return _decode(view)
+
+def iter_text_from_txt(path: str, block_size: int = BLOCK_SIZE):
+    """
+    Decoded text in blocks, for streaming consumers. Falls back to latin-1
+    like extract_text_from_txt if the file is not valid UTF-8.
+    """
+    encoding = "utf-8" if _is_utf8(path, block_size) else "latin-1"
+    with open(path, "r", encoding=encoding, newline="") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
+def _is_utf8(path: str, block_size: int) -> bool:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        try:
+            while True:
+                block = f.read(block_size)
+                decoder.decode(block, final=not block)
+                if not block:
+                    return True
+        except UnicodeDecodeError:
+            return False
+
+def _decode(data) -> str:
     try:
-        text = file_bytes.decode("utf-8")
+        text = str(data, "utf-8")
     except UnicodeDecodeError:
-        text = file_bytes.decode("latin-1")
+        text = str(data, "latin-1")
 
     return text.strip()
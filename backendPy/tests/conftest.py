@@ -0,0 +1,5 @@
+import os
+import sys
+
+# backend modules are imported flat (as uvicorn main:app runs them from backendPy/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,34 @@
+from context_packer import estimate_tokens, pack_contexts, truncate_tokens
+
+
+def hit(text, score=1.0, start=-1):
+    return {"text": text, "score": score, "start": start, "end": start + len(text) if start >= 0 else -1}
+
+
+def test_dense_span_truncated_within_budget():
+    # punctuation-heavy head, plain prose tail: the head has far more tokens
+    # per character than the span's average
+    dense = (
+        "Clause 4.2(a)(iii): Rs.1,00,000/- (i.e. ~₹1L); see §§3-5, 7(b)... " * 10
+        + "The parties agree to the terms set out in this agreement. " * 60
+    )
+    packed, stats = pack_contexts([hit(dense)], token_budget=50)
+
+    assert len(packed) == 1
+    assert estimate_tokens(packed[0]["text"]) <= 50
+    assert stats["context_tokens"] <= 50
+    assert dense.startswith(packed[0]["text"])
+
+
+def test_truncation_keeps_the_whole_budget():
+    text = "word " * 100
+    assert estimate_tokens(truncate_tokens(text, 30)) == 30
+    assert truncate_tokens("short text", 30) == "short text"
+
+
+def test_lower_spans_dropped_once_budget_is_used():
+    hits = [hit("alpha beta gamma", 0.9, 0), hit("delta epsilon " * 50, 0.5, 100)]
+    packed, stats = pack_contexts(hits, token_budget=10)
+
+    assert [p["text"] for p in packed] == ["alpha beta gamma"]
+    assert stats["dropped"] == 1
@@ -0,0 +1,86 @@
+# uploads.py
+import os
+import uuid
+import hashlib
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+
+
+def upload_limit_for(path: str) -> int:
+    if path.startswith("/documents/bulk"):
+        return settings.BULK_MAX_UPLOAD_BYTES
+    return settings.MAX_UPLOAD_BYTES
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects with 413 before the multipart body is read when the client
+    declares its size; save_upload enforces the same limit on the bytes
+    actually received. Plain ASGI so it can sit under CORS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            if content_length.isdigit():
+                limit = upload_limit_for(scope["path"])
+                if int(content_length) > limit + settings.MULTIPART_OVERHEAD_BYTES:
+                    response = JSONResponse(
+                        status_code=413,
+                        content={"detail": f"File too large (limit {limit // (1024 * 1024)} MB)"}
+                    )
+                    return await response(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+def temp_upload_path(ext: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, f".incoming-{uuid.uuid4().hex}{ext}")
+
+
+async def save_upload(file: UploadFile, dest_path: str, max_bytes: int = None) -> dict:
+    """
+    Copy an upload to dest_path in UPLOAD_CHUNK_BYTES pieces without holding
+    the whole file in memory, hashing as it goes. Aborts with 413 (and
+    removes the partial file) as soon as max_bytes is exceeded.
+
+    Returns {"size_bytes": int, "sha256": str}.
+    """
+    max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+    digest = hashlib.sha256()
+    size = 0
+
+    f = await run_in_threadpool(open, dest_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(settings.UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large (limit {max_bytes // (1024 * 1024)} MB)"
+                )
+            digest.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        f.close()
+        discard(dest_path)
+        raise
+
+    await run_in_threadpool(f.close)
+    return {"size_bytes": size, "sha256": digest.hexdigest()}
+
+
+def discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
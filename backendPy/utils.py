@@ -1,50 +1,22 @@
 # utils.py
 import os, io, json, pickle
 from config import settings
-from sentence_transformers import SentenceTransformer
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-import pdfplumber
-from docx import Document
+from metrics import track_stage, count_items
+# text-only helpers live in extraction so worker processes can use them without the embedder
+from extraction import ALLOWED, splitter, extract_text_from_file, chunk_text, chunk_text_with_offsets
+from chunker import ChunkView
 import faiss
 import numpy as np
-import requests
 
 # Load embedder once
-EMBED_MODEL = "intfloat/e5-large-v2"
-embedder = SentenceTransformer(EMBED_MODEL)
-
-# chunker
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size=800, chunk_overlap=150,
-    separators=["\n\n","\n","Clause ","Section ","Article ","Paragraph ","."," "], keep_separator=True
-)
-
-ALLOWED = (".pdf", ".txt", ".docx")
-
-def extract_text_from_file(file_path: str):
-    text = ""
-    if file_path.lower().endswith(".pdf"):
-        with pdfplumber.open(file_path) as pdf:
-            for p in pdf.pages:
-                t = p.extract_text()
-                if t:
-                    text += t + "\n"
-    elif file_path.lower().endswith(".txt"):
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read()
-    elif file_path.lower().endswith(".docx"):
-        doc = Document(file_path)
-        text = "\n".join([p.text for p in doc.paragraphs])
-    else:
-        raise ValueError("Unsupported file type")
-    return text.strip()
+from embedders import EMBED_MODEL, load_embedder
 
-def chunk_text(text: str):
-    return splitter.split_text(text)
+embedder = load_embedder()
 
 def embed_chunks(chunks: list, batch_size=32):
-    emb = embedder.encode(chunks, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True)
-    return emb.astype("float32")
+    count_items("embedding", len(chunks))
+    emb = embedder.encode(list(chunks), batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True)
+    return emb.astype("float32", copy=False)
 
 def build_faiss_index(embeddings: np.ndarray):
     dim = embeddings.shape[1]
@@ -52,6 +24,12 @@ def build_faiss_index(embeddings: np.ndarray):
     index.add(embeddings)
     return index
 
+def store_document_index(doc_id: str, chunks: list, offsets: list, embeddings: np.ndarray):
+    index = build_faiss_index(embeddings)
+    save_index(index, doc_id)
+    save_chunks(doc_id, chunks, offsets)
+    return index
+
 def save_index(index, doc_id: str):
     path = os.path.join(settings.INDEX_DIR, f"{doc_id}.index")
     faiss.write_index(index, path)
@@ -63,49 +41,94 @@ def load_index(doc_id: str):
         return None
     return faiss.read_index(path)
 
-def save_chunks(doc_id: str, chunks: list):
+def save_chunks(doc_id: str, chunks: list, offsets: list = None):
     path = os.path.join(settings.CHUNKS_DIR, f"{doc_id}.pkl")
+    if isinstance(chunks, ChunkView):
+        # document text + offsets only; chunks are sliced again on load
+        payload = {"text": chunks.text, "offsets": chunks.offsets}
+    elif offsets is not None:
+        payload = {"chunks": chunks, "offsets": offsets}
+    else:
+        payload = chunks
     with open(path, "wb") as f:
-        pickle.dump(chunks, f)
+        pickle.dump(payload, f)
     return path
 
-def load_chunks(doc_id: str):
+def load_chunk_store(doc_id: str):
+    """
+    Returns (chunks, offsets). offsets is None for stores written before
+    offsets were recorded.
+    """
     path = os.path.join(settings.CHUNKS_DIR, f"{doc_id}.pkl")
     if not os.path.exists(path):
-        return None
+        return None, None
     with open(path, "rb") as f:
-        return pickle.load(f)
-
-# OpenRouter LLM call
-def generate_with_openrouter(prompt: str, max_tokens=300, temperature=0.1):
-    headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": settings.OPENROUTER_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a legal assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        "max_tokens": max_tokens,
-        "temperature": temperature
-    }
-    resp = requests.post(settings.OPENROUTER_BASE_URL, headers=headers, json=payload, timeout=60)
-    resp.raise_for_status()
-    data = resp.json()
-    return data["choices"][0]["message"]["content"].strip()
+        payload = pickle.load(f)
+    if isinstance(payload, dict) and "text" in payload:
+        return ChunkView(payload["text"], payload["offsets"]), payload["offsets"]
+    if isinstance(payload, dict):
+        return payload["chunks"], payload.get("offsets")
+    return payload, None
+
+def load_chunks(doc_id: str):
+    return load_chunk_store(doc_id)[0]
+
+def embed_query(query: str):
+    with track_stage("query_embedding"):
+        q_emb = embedder.encode([query], normalize_embeddings=True)
+    return q_emb.astype("float32", copy=False)
 
 # retrieval helper (simple top-k using faiss index and chunks)
-def retrieve_chunks_for_doc(doc_id: str, query: str, k=3, fetch_k=10):
+def retrieve_chunks_for_doc(doc_id: str, query: str, k=3, fetch_k=10, q_emb=None):
     index = load_index(doc_id)
     if index is None:
         return [], []
-    q_emb = embedder.encode([query], normalize_embeddings=True)
-    scores, indices = index.search(q_emb.astype("float32"), fetch_k)
+    if q_emb is None:
+        q_emb = embed_query(query)
+    with track_stage("faiss_search"):
+        scores, indices = index.search(q_emb, fetch_k)
     # load chunks and select top k
     chunks = load_chunks(doc_id)
     if chunks is None:
         return [], []
     candidate_chunks = [chunks[i] for i in indices[0] if i < len(chunks)]
     return candidate_chunks[:k], (scores[0][:k].tolist() if len(scores)>0 else [])
+
+def retrieve_chunk_hits(doc_id: str, query: str, fetch_k=10, q_emb=None):
+    """
+    Like retrieve_chunks_for_doc, but returns hits in score order as dicts with
+    the chunk position so callers can merge neighbouring chunks.
+    """
+    if q_emb is None:
+        q_emb = embed_query(query)
+    return retrieve_chunk_hits_batch(doc_id, q_emb, fetch_k=fetch_k)[0]
+
+def embed_queries(queries: list):
+    with track_stage("query_embedding"):
+        q_emb = embedder.encode(queries, batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+    return q_emb.astype("float32", copy=False)
+
+def retrieve_chunk_hits_batch(doc_id: str, q_embs: np.ndarray, fetch_k=10):
+    """
+    One index load and one FAISS search for a matrix of query embeddings.
+    Returns one hit list (see retrieve_chunk_hits) per query row.
+    """
+    index = load_index(doc_id)
+    if index is None:
+        return [[] for _ in range(len(q_embs))]
+    with track_stage("faiss_search"):
+        scores, indices = index.search(q_embs, fetch_k)
+    chunks, offsets = load_chunk_store(doc_id)
+    if chunks is None:
+        return [[] for _ in range(len(q_embs))]
+
+    results = []
+    for row_scores, row_indices in zip(scores.tolist(), indices.tolist()):
+        hits = []
+        for score, i in zip(row_scores, row_indices):
+            if i < 0 or i >= len(chunks):
+                continue
+            start, end = (int(offsets[i][0]), int(offsets[i][1])) if offsets is not None else (-1, -1)
+            hits.append({"index": i, "text": chunks[i], "score": score, "start": start, "end": end})
+        results.append(hits)
+    return results
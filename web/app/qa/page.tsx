@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState, Suspense } from 'react';
+import { useEffect, useRef, useState, Suspense } from 'react';
 import { useRouter, useSearchParams } from 'next/navigation';
 import { useAuth } from '@/lib/AuthContext';
 import { api } from '@/lib/api';
@@ -35,8 +35,14 @@ function QAContent() {
   const [statusLoading, setStatusLoading] = useState(true);
   const [error, setError] = useState('');
   const [history, setHistory] = useState<QAHistory[]>([]);
+  // answer currently streaming in, shown above the history
+  const [pending, setPending] = useState<QAHistory | null>(null);
+  const askController = useRef<AbortController | null>(null);
   const [docStatus, setDocStatus] = useState<string>('');
 
+  // stop an in-flight answer stream when leaving the page
+  useEffect(() => () => askController.current?.abort(), []);
+
   useEffect(() => {
     if (!isAuthenticated) {
       router.push('/login');
@@ -50,8 +56,16 @@ function QAContent() {
     }
     setDocumentId(docId);
 
-    // Polling document status
+    // Document status: pushed over the status stream, polled only if the stream fails
     let interval: number | undefined;
+    const applyStatus = (status: string, statusError?: string | null) => {
+      setDocStatus(status);
+      setStatusLoading(false);
+      if (status === 'FAILED' || status.toLowerCase() === 'failed') {
+        setError(statusError || 'Document processing failed');
+      }
+    };
+
     const checkStatus = async () => {
       try {
         const resp = await api.getDocumentStatus(docId);
@@ -71,11 +85,28 @@ function QAContent() {
       }
     };
 
-    // Initial status check
-    checkStatus();
-    interval = window.setInterval(checkStatus, 2000);
+    const controller = new AbortController();
+    api
+      .streamDocumentEvents(
+        (events) => {
+          events.forEach((e) => {
+            if (e.document_id === docId && e.status) applyStatus(e.status, e.error);
+          });
+        },
+        controller.signal,
+        docId
+      )
+      .catch((e) => {
+        if (!controller.signal.aborted) console.warn('Status stream unavailable, polling instead', e);
+      })
+      .finally(() => {
+        if (controller.signal.aborted) return;
+        checkStatus();
+        interval = window.setInterval(checkStatus, 2000);
+      });
 
     return () => {
+      controller.abort();
       if (interval) window.clearInterval(interval);
     };
   }, [isAuthenticated, router, searchParams]);
@@ -121,16 +152,23 @@ function QAContent() {
 
     setLoading(true);
     setError('');
+    const asked = question.trim();
+    const controller = new AbortController();
+    askController.current = controller;
+    setPending({ question: asked, answer: '', contexts: [], timestamp: new Date() });
     try {
-      const response = await api.askQuestion({
-        document_id: documentId,
-        question: question.trim(),
-        top_k: 3,
-      });
+      const response = await api.askQuestionStream(
+        { document_id: documentId, question: asked, top_k: 3 },
+        {
+          onContexts: (contexts) => setPending((p) => (p ? { ...p, contexts } : p)),
+          onToken: (text) => setPending((p) => (p ? { ...p, answer: p.answer + text } : p)),
+        },
+        controller.signal
+      );
 
       setHistory((prev) => [
         {
-          question: question.trim(),
+          question: asked,
           answer: response.answer,
           contexts: response.contexts,
           timestamp: new Date(),
@@ -139,8 +177,9 @@ function QAContent() {
       ]);
       setQuestion('');
     } catch (err: any) {
-      setError(err.message || 'Failed to get answer');
+      if (err?.name !== 'AbortError') setError(err.message || 'Failed to get answer');
     } finally {
+      setPending(null);
       setLoading(false);
     }
   };
@@ -204,14 +243,14 @@ function QAContent() {
 
             {/* Q&A History */}
             <div className="mt-6 space-y-4">
-              {history.length === 0 ? (
+              {history.length === 0 && !pending ? (
                 <Card>
                   <CardContent className="text-center py-12 text-slate-500">
                     No questions asked yet. Start by asking a question above!
                   </CardContent>
                 </Card>
               ) : (
-                history.map((item, index) => (
+                (pending ? [pending, ...history] : history).map((item, index) => (
                   <Card key={index}>
                     <CardHeader>
                       <CardTitle className="text-lg">Q: {item.question}</CardTitle>
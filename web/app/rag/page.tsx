@@ -4,7 +4,7 @@
 import { useEffect, useState, useRef } from 'react';
 import { useRouter } from 'next/navigation';
 import { useAuth } from '@/lib/AuthContext';
-import { api, DocumentResponse } from '@/lib/api';
+import { api, DocumentResponse, DocumentStatusEvent } from '@/lib/api';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
@@ -26,7 +26,21 @@ export default function DashboardPage() {
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
   const [documents, setDocuments] = useState<DocumentResponse[]>([]);
-  const pollingRefs = useRef<Record<string, number>>({}); // store intervals
+  const pollingRefs = useRef<Record<string, number>>({}); // store intervals (fallback when the status stream is down)
+  const streamDown = useRef(false);
+  // latest pushed status per document id, including ids not in `documents` yet
+  // (events can arrive before the list loads or before the upload response)
+  const latestStatus = useRef<Record<string, string>>({});
+  const documentsRef = useRef<DocumentResponse[]>([]);
+
+  useEffect(() => {
+    documentsRef.current = documents;
+  }, [documents]);
+
+  const withLatestStatus = (d: DocumentResponse): DocumentResponse => {
+    const status = latestStatus.current[d.document_id];
+    return status ? { ...d, status } : d;
+  };
 
   useEffect(() => {
     if (!isAuthenticated) {
@@ -37,19 +51,36 @@ export default function DashboardPage() {
     // load user's existing documents
     (async () => {
       try {
-        const docs = await api.getUserDocuments();
+        const docs = (await api.getUserDocuments()).map(withLatestStatus);
         setDocuments(docs);
-        // start polling for any that are not ready
-        docs.forEach((d) => {
-          if (!isReady(d.status)) startPollingStatus(d.document_id);
-        });
+        if (streamDown.current) {
+          docs.forEach((d) => {
+            if (!isReady(d.status)) startPollingStatus(d.document_id);
+          });
+        }
       } catch (e: any) {
         console.warn('Could not fetch documents', e);
         setError(e.message || 'Could not fetch documents');
       }
     })();
 
+    // status changes are pushed by the server; poll only if the stream fails
+    const controller = new AbortController();
+    api
+      .streamDocumentEvents(applyStatusEvents, controller.signal)
+      .catch((e) => {
+        if (!controller.signal.aborted) console.warn('Status stream unavailable, polling instead', e);
+      })
+      .finally(() => {
+        if (controller.signal.aborted) return;
+        streamDown.current = true;
+        documentsRef.current.forEach((d) => {
+          if (!isReady(d.status)) startPollingStatus(d.document_id);
+        });
+      });
+
     return () => {
+      controller.abort();
       Object.values(pollingRefs.current).forEach((id) => clearInterval(id));
     };
     // eslint-disable-next-line react-hooks/exhaustive-deps
@@ -69,6 +100,13 @@ export default function DashboardPage() {
     }
   };
 
+  const applyStatusEvents = (events: DocumentStatusEvent[]) => {
+    events.forEach((e) => {
+      if (e.status) latestStatus.current[e.document_id] = e.status;
+    });
+    setDocuments((prev) => prev.map(withLatestStatus));
+  };
+
   const startPollingStatus = (docId: string) => {
     if (pollingRefs.current[docId]) return;
 
@@ -107,14 +145,14 @@ export default function DashboardPage() {
     setSuccess('');
 
     try {
-      const response = await api.uploadDocument(file);
+      const response = withLatestStatus(await api.uploadDocument(file));
       setDocuments((prev) => [response, ...prev]);
       setSuccess(`Document "${response.filename}" uploaded successfully! Processing...`);
       setFile(null);
       const fileInput = document.getElementById('file-upload') as HTMLInputElement;
       if (fileInput) fileInput.value = '';
 
-      startPollingStatus(response.document_id);
+      if (streamDown.current && !isReady(response.status)) startPollingStatus(response.document_id);
     } catch (err: any) {
       setError(err.message || 'Upload failed');
     } finally {
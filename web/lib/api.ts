@@ -32,6 +32,7 @@ export interface QARequest {
   document_id: string;
   question: string;
   top_k?: number;
+  fast_path?: boolean;
 }
 
 export interface QAResponse {
@@ -39,6 +40,12 @@ export interface QAResponse {
   contexts: string[];
 }
 
+// Callbacks for POST /qa/ask/stream
+export interface QAStreamHandlers {
+  onContexts?: (contexts: string[]) => void;
+  onToken: (text: string) => void;
+}
+
 export interface DocumentStatusResp {
   document_id: string;
   status: string;
@@ -46,6 +53,17 @@ export interface DocumentStatusResp {
   chunks_count?: number;
 }
 
+// Pushed by GET /documents/events; only the fields that changed are set
+export interface DocumentStatusEvent {
+  document_id: string;
+  status?: string;
+  stage?: string;
+  chunks_count?: number;
+  stage_durations?: Record<string, number>;
+  error?: string | null;
+  artifacts?: Record<string, string>;
+}
+
 // Auth helpers
 export const setToken = (token: string) => {
   localStorage.setItem('access_token', token);
@@ -70,6 +88,32 @@ async function handleNonOk(resp: Response) {
   }
 }
 
+// Reads a Server-Sent Events body, calling onEvent(event, data) per frame;
+// keepalive comments are skipped. Resolves when the server closes the stream.
+async function readEventStream(resp: Response, onEvent: (event: string, data: any) => void) {
+  const reader = resp.body!.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = 'message';
+      const data: string[] = [];
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data.push(line.slice(6));
+      }
+      if (!data.length) continue; // keepalive comment
+      onEvent(event, JSON.parse(data.join('\n')));
+    }
+  }
+}
+
 export const api = {
   // Auth
   signup: async (data: UserSignup): Promise<UserOut> => {
@@ -153,6 +197,48 @@ export const api = {
     return resp.json();
   },
 
+  // Ask question, streaming the answer (Server-Sent Events read with fetch).
+  // Contexts arrive first, then answer tokens; resolves with the full answer.
+  // Aborting the signal closes the stream and cancels generation server-side.
+  askQuestionStream: async (
+    data: QARequest,
+    handlers: QAStreamHandlers,
+    signal?: AbortSignal
+  ): Promise<QAResponse> => {
+    const token = getToken();
+    if (!token) throw new Error('Not authenticated');
+
+    const resp = await fetch(`${API_BASE_URL}/qa/ask/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify(data),
+      signal,
+    });
+    if (!resp.ok || !resp.body) await handleNonOk(resp);
+
+    let contexts: string[] = [];
+    let result = null as QAResponse | null; // assigned in the callback
+    let error = '';
+    await readEventStream(resp, (event, payload) => {
+      if (event === 'contexts') {
+        contexts = payload.contexts;
+        handlers.onContexts?.(contexts);
+      } else if (event === 'token') {
+        handlers.onToken(payload.text);
+      } else if (event === 'done') {
+        result = { answer: payload.answer, contexts };
+      } else if (event === 'error') {
+        error = payload.detail;
+      }
+    });
+    if (!result) throw new Error(error || 'Answer stream ended unexpectedly');
+    return result;
+  },
+
   simplifyFile: async (file: File): Promise<{ filename: string; simplified_text: string }> => {
   const token = getToken();
   if (!token) throw new Error('Not authenticated');
@@ -187,4 +273,26 @@ simplifyText: async (text: string): Promise<{ simplified_text: string }> => {
   return resp.json();
 },
 
+  // Document status push stream (Server-Sent Events read with fetch, since
+  // EventSource cannot send the Authorization header). Calls onEvent with the
+  // initial snapshot, then with each change; resolves when the server closes
+  // the stream, rejects on HTTP / network errors or abort.
+  streamDocumentEvents: async (
+    onEvent: (events: DocumentStatusEvent[]) => void,
+    signal: AbortSignal,
+    documentId?: string
+  ): Promise<void> => {
+    const token = getToken();
+    if (!token) throw new Error('Not authenticated');
+
+    const query = documentId ? `?document_id=${encodeURIComponent(documentId)}` : '';
+    const resp = await fetch(`${API_BASE_URL}/documents/events${query}`, {
+      headers: { Authorization: `Bearer ${token}`, Accept: 'text/event-stream' },
+      signal,
+    });
+    if (!resp.ok || !resp.body) await handleNonOk(resp);
+
+    await readEventStream(resp, (_event, data) => onEvent(Array.isArray(data) ? data : [data]));
+  },
+
 };